@@ -20,11 +20,14 @@ from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from index_versions import current_dir
+from profiling import run_stage
+
 # ---------- paths ----------
 
 BASE_DIR = Path(__file__).resolve().parent
 CHUNKS_DIR = BASE_DIR / "data_chunks"
-INDEX_DIR = BASE_DIR / "vectorstore" / "medlineplus_faiss"
+INDEX_DIR = Path(current_dir())  # live index version (see index_versions.py)
 META_PATH = INDEX_DIR / "metadata.jsonl"
 
 # Root project structure:
@@ -133,7 +136,8 @@ def main():
             f.write(json.dumps(rec_out, ensure_ascii=False) + "\n")
 
     print(f"[EXPORT] Wrote {len(records)} embeddings → {OUT_PATH}")
+    return len(records)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("06_export", main, unit="embeddings")
@@ -3,81 +3,268 @@
 FAISS retrieval with SBERT embeddings + OpenRouter for generated answers.
 """
 
-import os
+import argparse
 import json
-from pathlib import Path
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
 
 import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
 import requests
 
+from context_packer import pack_context, extractive_answer, CONTEXT_TOKEN_BUDGET
+from qa_metrics import (
+    FALLBACKS,
+    SHARD_PARTIAL,
+    current_trace,
+    span,
+    request_trace,
+    record_cache,
+    record_llm_usage,
+    register_action,
+    register_probe,
+    start_metrics_server,
+)
+from index_reload import IndexVersion, VersionManager
+from startup import LazyComponent, Startup
+from translate_stream import TranslationClient, iter_sentences, pipelined
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from retrieval_state import (  # noqa: E402  (lives in rag/)
+    CompactChunkStore,
+    JsonChunkStore,
+    has_compact_state,
+    load_chunk_texts,
+    load_metadata,
+)
+from sharding import HttpShard, LocalShard, ShardedIndex, shard_dirs  # noqa: E402
+from doc_index import TOP_DOCS, TwoLevelIndex  # noqa: E402
+from index_versions import LEGACY_VERSION, current_version, version_dir  # noqa: E402
+from multilingual_index import (  # noqa: E402
+    LANG_ENCODER,
+    LANGUAGE_NAMES,
+    LanguagePartition,
+    available_languages,
+    encode_passages,
+    encode_queries,
+)
+
 # ----- paths -----
+# The index, metadata, chunk store, docs/, shards/ and lang/ come from one
+# index version directory (see index_versions.py) and can be hot-reloaded.
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-
-INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
 CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
 
-INDEX_PATH = os.path.join(INDEX_DIR, "index.faiss")
-META_PATH = os.path.join(INDEX_DIR, "metadata.jsonl")
-
 # ----- OpenRouter -----
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
 if not OPENROUTER_API_KEY:
     raise ValueError("Set OPENROUTER_API_KEY!")
 
+OPENROUTER_URL = os.environ.get("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 ANSWER_MODEL = "openai/gpt-oss-20b:free"
 
-# ----- SBERT for embedding queries -----
+# Per-request latency budget (seconds, from the start of the request). If the
+# LLM has no first token by QA_FIRST_TOKEN_S or no full answer by QA_BUDGET_S,
+# it is cancelled and an extractive answer is returned instead. 0 disables.
+ANSWER_BUDGET_S = float(os.environ.get("QA_BUDGET_S", "20"))
+FIRST_TOKEN_BUDGET_S = float(os.environ.get("QA_FIRST_TOKEN_S", "10"))
+
+# translation-api, for answering in other languages (see translate_stream.py)
+TRANSLATION_URL = os.environ.get("TRANSLATION_URL", "http://localhost:8000/translate")
+translator = TranslationClient(TRANSLATION_URL)
+
+# ----- startup -----
+# background: load everything concurrently at start, warm up, then report ready
+# lazy:       load each component on first use
+STARTUP_MODE = os.environ.get("QA_STARTUP", "background")
+WARMUP_QUERY = "What are the side effects of ibuprofen?"
+
+# compact: memory-mapped arrays shared by all workers (see retrieval_state.py)
+# json:    metadata.jsonl + data_chunks/ parsed into Python objects per process
+# auto:    compact if the state files exist, else json
+STATE_MODE = os.environ.get("QA_STATE", "auto")
+
+# Sharded retrieval (see sharding.py):
+#   unset:                    single index.faiss in this process
+#   local:                    every shard in the version's shards/, searched in this process
+#   http://h1:9201,http://..  one retrieval worker per shard (reloaded by restarting them)
+SHARDS = os.environ.get("QA_SHARDS", "")
+SHARD_TIMEOUT_S = float(os.environ.get("QA_SHARD_TIMEOUT", "2.0"))
+
+# flat:      exact search over every chunk
+# two_level: pick the top QA_TOP_DOCS documents from the document index
+#            (see doc_index.py), then score only their chunks
+SEARCH_MODE = os.environ.get("QA_SEARCH", "flat")
+QA_TOP_DOCS = int(os.environ.get("QA_TOP_DOCS", str(TOP_DOCS)))
+
+# Pre-translated language partitions (see multilingual_index.py): questions in
+# these languages are answered from their partition without online translation.
+# on: use every built partition; off: always go through translation-api
+LANG_INDEX = os.environ.get("QA_LANG_INDEX", "on")
+
+# Hot reload (see index_reload.py): poll for a new published version every
+# QA_RELOAD_WATCH_S seconds (0: only on POST /admin/reload)
+RELOAD_WATCH_S = float(os.environ.get("QA_RELOAD_WATCH_S", "0"))
+
+# SBERT for embedding queries
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
-
-# ----- load FAISS -----
-index = faiss.read_index(INDEX_PATH)
-
-# ----- load metadata -----
-metadata = []
-with open(META_PATH, "r", encoding="utf-8") as f:
-    for line in f:
-        metadata.append(json.loads(line))
-
-# ----- load chunk texts -----
-chunk_text_map = {}
-for root, _, files in os.walk(CHUNKS_DIR):
-    for fname in files:
-        if not fname.endswith(".jsonl"):
-            continue
-        with open(Path(root) / fname, "r", encoding="utf-8") as f:
-            for line in f:
-                rec = json.loads(line)
-                chunk_text_map[rec["id"]] = rec["text"]
+
+
+def load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+def load_index(path: str):
+    if SEARCH_MODE == "two_level":
+        if SHARDS:
+            raise ValueError("QA_SEARCH=two_level needs the single index; unset QA_SHARDS")
+        return TwoLevelIndex(load_flat_index(path), os.path.join(path, "docs"), top_docs=QA_TOP_DOCS)
+    if SHARDS == "local":
+        dirs = shard_dirs(os.path.join(path, "shards"))
+        return ShardedIndex([LocalShard(d) for d in dirs], timeout=SHARD_TIMEOUT_S)
+    if SHARDS:
+        urls = [u.strip() for u in SHARDS.split(",") if u.strip()]
+        return ShardedIndex([HttpShard(u, timeout=SHARD_TIMEOUT_S) for u in urls], timeout=SHARD_TIMEOUT_S)
+    return load_flat_index(path)
+
+
+def load_flat_index(path: str):
+    import faiss
+    index_path = os.path.join(path, "index.faiss")
+    # Memory-map the index where supported so worker processes share its pages
+    try:
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(index_path)
+
+
+def load_lang_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(LANG_ENCODER)
+
+
+def open_version(name: str) -> IndexVersion:
+    """Loaders for everything read from one index version (nothing loads yet)."""
+    path = version_dir(name)
+    parts = [LazyComponent("index", lambda: load_index(path))]
+
+    state_dir = os.path.join(path, "state")
+    if STATE_MODE == "compact" or (STATE_MODE == "auto" and has_compact_state(state_dir)):
+        parts.append(LazyComponent("chunk_store", lambda: CompactChunkStore(state_dir)))
+    else:
+        metadata = LazyComponent("metadata", lambda: load_metadata(os.path.join(path, "metadata.jsonl")))
+        chunk_texts = LazyComponent("chunk_texts", lambda: load_chunk_texts(CHUNKS_DIR))
+        chunk_store = LazyComponent(
+            "chunk_store", lambda: JsonChunkStore(metadata.get(), chunk_texts.get())
+        )
+        parts += [metadata, chunk_texts, chunk_store]
+
+    if LANG_INDEX == "on":
+        lang_dir = os.path.join(path, "lang")
+        parts += [
+            LazyComponent(f"index_{lang}", lambda lang=lang: LanguagePartition(lang, lang_dir))
+            for lang in available_languages(lang_dir)
+        ]
+    return IndexVersion(name, path, parts)
+
+
+def live_version() -> str:
+    return current_version() or LEGACY_VERSION
+
+
+def has_lang_partition(version: IndexVersion, lang: str) -> bool:
+    return version.has(f"index_{lang}")
+
+
+model = LazyComponent("model", load_model)
+lang_model = LazyComponent("lang_model", load_lang_model)
+
+def warmup_version(v: IndexVersion):
+    """Runs retrieval end to end on a new version before it takes traffic."""
+    langs = {name[len("index_"):] for name in v.components if name.startswith("index_")}
+    dropped = {name[len("index_"):] for name in versions.active.components if name.startswith("index_")} - langs
+    if dropped:
+        print(f"[RELOAD] Version {v.name} has no partition for {', '.join(sorted(dropped))}; "
+              f"those languages will go through translation-api")
+    if langs:
+        lang_model.get()  # not loaded at startup if the first version had no partitions
+    search_faiss(WARMUP_QUERY, k=5, version=v)
+
+
+versions = VersionManager(
+    open_version(live_version()),
+    open_version,
+    resolve=live_version,
+    warmup=warmup_version,
+)
+components = [model, *versions.active.components.values()]
+if any(name.startswith("index_") for name in versions.active.components):
+    components.append(lang_model)
+
+
+def warmup():
+    # Runs retrieval end to end (not the LLM) so first-query costs are paid here
+    search_faiss(WARMUP_QUERY, k=5)
+
+
+startup = Startup(components, warmup=warmup)
 
 
 # ----- helpers -----
 def embed_query(text: str):
-    emb = model.encode([text], convert_to_numpy=True, normalize_embeddings=True)
+    with span("embed_query"):
+        emb = model.get().encode([text], convert_to_numpy=True, normalize_embeddings=True)
     return emb.astype("float32")
 
 
-def search_faiss(query: str, k: int = 5):
-    qvec = embed_query(query)
-    scores, indices = index.search(qvec, k)
+def embed_sentences(sentences):
+    return model.get().encode(sentences, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def count_tokens(text: str) -> int:
+    return len(model.get().tokenizer.tokenize(text))
+
+
+def search_faiss(query: str, k: int = 5, qvec=None, version: IndexVersion | None = None):
+    if qvec is None:
+        qvec = embed_query(query)
+    with versions.acquire(version) as v:
+        with span("index_search"):
+            scores, indices = search_index(qvec, k, v)
+        with span("chunk_lookup"):
+            return lookup_chunks(scores[0], indices[0], v.get("chunk_store"))
+
 
+def search_index(qvecs, k: int, version: IndexVersion):
+    """index.search(), noting in the trace any shards that were skipped."""
+    idx = version.get("index")
+    if not isinstance(idx, ShardedIndex):
+        return idx.search(qvecs, k)
+    scores, indices, missing = idx.search_partial(qvecs, k)
+    if missing:
+        SHARD_PARTIAL.inc()
+        trace = current_trace()
+        if trace is not None:
+            trace.fields["missing_shards"] = missing
+    return scores, indices
+
+
+def lookup_chunks(scores, indices, store):
+    """Turn one row of index.search() output into result dicts."""
     results = []
-    for score, idx in zip(scores[0], indices[0]):
-        meta = metadata[idx]
-        cid = meta["id"]
-        results.append({
-            "score": float(score),
-            "id": cid,
-            "source": meta["source"],
-            "chunk_index": meta["chunk_index"],
-            "text": chunk_text_map[cid]
-        })
+    for score, idx in zip(scores, indices):
+        rec = store.lookup(int(idx))
+        record_cache("chunk_text", rec is not None)
+        if rec is None:
+            continue
+        results.append({"score": float(score), **rec})
     return results
 
 
-def call_openrouter(prompt: str):
+def call_openrouter(prompt: str, timeout: float | None = None):
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
@@ -86,20 +273,26 @@ def call_openrouter(prompt: str):
         "model": ANSWER_MODEL,
         "messages": [{"role": "user", "content": prompt}]
     }
-    resp = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
-        json=payload,
-        headers=headers
-    )
-    return resp.json()["choices"][0]["message"]["content"]
+    with span("call_openrouter"):
+        resp = requests.post(
+            OPENROUTER_URL,
+            json=payload,
+            headers=headers,
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    record_llm_usage(data.get("usage"))
+    return data["choices"][0]["message"]["content"]
 
 
-def build_prompt(question: str, contexts):
+def build_prompt(question: str, contexts, language: str | None = None):
     ctx = "\n\n---\n\n".join(
         [f"[{c['source']}]\n{c['text']}" for c in contexts]
     )
+    answer_in = f" Answer in {language}." if language else ""
     return f"""
-Answer the medical question ONLY using the context:
+Answer the medical question ONLY using the context:{answer_in}
 
 QUESTION:
 {question}
@@ -112,8 +305,493 @@ If the answer is not in the context, say:
 """
 
 
+class DeadlineExceeded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def stream_openrouter(prompt: str, timeout=None, deadline: float | None = None,
+                      cancelled: threading.Event | None = None, on_usage=record_llm_usage,
+                      first_token_by: float | None = None):
+    """
+    Yield answer text deltas from a streamed (SSE) chat completion.
+
+    `timeout` is requests' per-read timeout. `deadline`, `first_token_by`
+    (time.monotonic()) and `cancelled` are checked on every line,
+    keep-alive comments included, so a stream that only sends keep-alives
+    is still dropped on time: past a deadline it raises DeadlineExceeded,
+    once cancelled it just ends.
+    """
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "model": ANSWER_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+    }
+    resp = requests.post(OPENROUTER_URL, json=payload, headers=headers, timeout=timeout, stream=True)
+    got_token = False
+    try:
+        resp.raise_for_status()
+        for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+            if cancelled is not None and cancelled.is_set():
+                return
+            now = time.monotonic()
+            if first_token_by is not None and not got_token and now >= first_token_by:
+                raise DeadlineExceeded("first_token_timeout")
+            if deadline is not None and now >= deadline:
+                raise DeadlineExceeded("completion_timeout")
+            # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if chunk.get("usage"):
+                on_usage(chunk["usage"])
+            choices = chunk.get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                got_token = True
+                yield delta
+    finally:
+        resp.close()
+
+
+_llm_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm")
+
+
+def call_openrouter_within(prompt: str, first_token_at: float, deadline: float) -> str:
+    """
+    Stream the answer in a worker thread and wait for it until the
+    (time.monotonic()) deadlines. Raises DeadlineExceeded, and cancels the
+    upstream stream, if the first token or the full answer is late.
+    """
+    cancelled = threading.Event()
+    first_token = threading.Event()
+
+    def run():
+        parts, usage = [], {}
+        try:
+            # The worker drops the stream itself at the deadline or on cancel
+            # (checked at every line, keep-alives included; a connection gone
+            # fully silent is cut by the read timeout), so a late answer
+            # doesn't keep holding an _llm_pool thread.
+            for delta in stream_openrouter(
+                prompt, timeout=max(0.1, deadline - time.monotonic()),
+                deadline=deadline, cancelled=cancelled, on_usage=usage.update,
+            ):
+                parts.append(delta)
+                first_token.set()
+        finally:
+            first_token.set()  # wake the waiter on errors / empty answers too
+        return "".join(parts), usage
+
+    def cancel(reason: str):
+        cancelled.set()
+        raise DeadlineExceeded(reason)
+
+    with span("call_openrouter"):
+        future = _llm_pool.submit(run)
+        if not first_token.wait(max(0.0, min(first_token_at, deadline) - time.monotonic())):
+            cancel("first_token_timeout")
+        try:
+            answer, usage = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            cancel("completion_timeout")
+    # Recorded here, in the request's context, so the tokens land in its trace
+    record_llm_usage(usage)
+    return answer
+
+
+def fallback_answer(qvec, results, reason: str, encode=embed_sentences) -> dict:
+    with span("extractive_fallback"):
+        extracted = extractive_answer(qvec, results, encode)
+    FALLBACKS.inc(reason=reason)
+    return {
+        "answer": extracted["answer"] or "No answer found in the provided context.",
+        "fallback": True,
+        "reason": reason,
+        "citations": extracted["citations"],
+    }
+
+
+def prepare_prompt(question: str, k: int, version: IndexVersion | None = None):
+    """Embed, retrieve, pack and build the prompt; returns (qvec, results, contexts, prompt)."""
+    qvec = embed_query(question)
+    results = search_faiss(question, k=k, qvec=qvec, version=version)
+    with span("pack_context"):
+        contexts = pack_context(
+            qvec, results, embed_sentences,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            count_tokens=count_tokens,
+        )
+    with span("build_prompt"):
+        prompt = build_prompt(question, contexts)
+    return qvec, results, contexts, prompt
+
+
+def answer_question(question: str, k: int = 5, budget_s: float | None = None) -> dict:
+    """
+    Full QA flow for one question, timed stage by stage.
+
+    Returns {"answer", "fallback", "reason", "citations"}. With a budget
+    (default ANSWER_BUDGET_S), retrieval runs first and the LLM gets the
+    rest of it; when the LLM is late or fails, "fallback" is true and the
+    answer is extracted from the retrieved chunks.
+    """
+    budget_s = ANSWER_BUDGET_S if budget_s is None else budget_s
+    start = time.monotonic()
+    with request_trace(k=k) as trace:
+        qvec, results, contexts, prompt = prepare_prompt(question, k)
+        citations = [{"n": i + 1, "source": c["source"]} for i, c in enumerate(contexts)]
+
+        if not budget_s:
+            answer = call_openrouter(prompt)
+            return {"answer": answer, "fallback": False, "reason": None, "citations": citations}
+
+        deadline = start + budget_s
+        if time.monotonic() >= deadline:
+            reason = "budget_exhausted"
+        else:
+            try:
+                answer = call_openrouter_within(prompt, start + FIRST_TOKEN_BUDGET_S, deadline)
+                return {"answer": answer, "fallback": False, "reason": None, "citations": citations}
+            except DeadlineExceeded as e:
+                reason = e.reason
+            except (requests.RequestException, KeyError, ValueError) as e:
+                reason = "llm_error"
+                trace.fields["llm_error"] = repr(e)
+        trace.fields["fallback"] = reason
+        return fallback_answer(qvec, results, reason)
+
+
+def translate_or_original(text: str, src: str, tgt: str) -> str:
+    # Same policy as the Node backend: show the untranslated text rather than nothing
+    try:
+        return translator.translate(text, src, tgt)
+    except (requests.RequestException, KeyError, ValueError) as e:
+        print(f"[TRANSLATE] {src}->{tgt} failed, returning original: {e!r}")
+        return text
+
+
+def stream_answer(prompt: str, trace, fallback, outcome: dict, start: float,
+                  cancelled: threading.Event | None = None):
+    """
+    Answer deltas streamed from the LLM, within the request's budget
+    (ANSWER_BUDGET_S / FIRST_TOKEN_BUDGET_S from `start`, time.monotonic()).
+
+    If the LLM fails or is late before its first token, yield
+    fallback(reason)["answer"] instead and record it in `outcome`. After
+    the first token the partial answer is kept and the reason recorded.
+    Setting `cancelled`, or closing this generator, drops the upstream
+    stream.
+    """
+    cancelled = cancelled or threading.Event()
+    stream = stream_openrouter(
+        prompt,
+        # Bounds a connection gone silent; a stream of keep-alives is cut by the deadlines
+        timeout=(10, FIRST_TOKEN_BUDGET_S or ANSWER_BUDGET_S or None),
+        deadline=start + ANSWER_BUDGET_S if ANSWER_BUDGET_S else None,
+        first_token_by=start + FIRST_TOKEN_BUDGET_S if ANSWER_BUDGET_S and FIRST_TOKEN_BUDGET_S else None,
+        cancelled=cancelled,
+    )
+    got_token = False
+    try:
+        for delta in stream:
+            got_token = True
+            yield delta
+        return
+    except DeadlineExceeded as e:
+        reason = e.reason
+    except (requests.RequestException, KeyError, ValueError) as e:
+        reason = "llm_error"
+        trace.fields["llm_error"] = repr(e)
+    finally:
+        cancelled.set()
+        stream.close()
+
+    if got_token:
+        # Keep the partial answer already sent
+        outcome["reason"] = reason
+        trace.fields["partial_answer"] = reason
+        return
+    fb = fallback(reason)
+    outcome.update(fallback=True, reason=reason, citations=fb["citations"])
+    yield fb["answer"]
+
+
+def answer_question_translated(question: str, lang: str, k: int = 5, version: IndexVersion | None = None):
+    """
+    Pipelined multilingual QA. The question is translated to English, the
+    English answer is streamed from the LLM, and each completed sentence
+    is translated to `lang` while the LLM keeps generating.
+
+    Yields {"index", "text", "source_text"} per answer sentence, in order,
+    then {"done": True, "fallback", "reason", "citations"}.
+    """
+    with request_trace(k=k, lang=lang) as trace:
+        start = time.perf_counter()
+        started = time.monotonic()
+        with span("translate_question"):
+            question_en = translate_or_original(question, lang, "en")
+        qvec, results, contexts, prompt = prepare_prompt(question_en, k, version)
+        outcome = {
+            "fallback": False,
+            "reason": None,
+            "citations": [{"n": i + 1, "source": c["source"]} for i, c in enumerate(contexts)],
+        }
+        # The LLM stream is read in pipelined()'s feed thread; cancel it there if
+        # the caller stops reading
+        cancelled = threading.Event()
+        deltas = stream_answer(
+            prompt, trace, lambda reason: fallback_answer(qvec, results, reason), outcome, started, cancelled
+        )
+
+        def translate(sentence: str) -> str:
+            # Runs in pipelined()'s pool; sentences overlap, so this is summed time
+            with span("translate_answer"):
+                return translate_or_original(sentence, "en", lang)
+
+        sentences = pipelined(iter_sentences(deltas), translate, on_close=cancelled.set)
+        for i, (source_text, text) in enumerate(sentences):
+            if i == 0:
+                trace.fields["first_sentence_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            yield {"index": i, "text": text, "source_text": source_text}
+
+        if outcome["fallback"]:
+            trace.fields["fallback"] = outcome["reason"]
+    # After the trace is closed: a caller that stops at "done" ends the request
+    # as finished, not as an error
+    yield {"done": True, **outcome}
+
+
+def answer_question_multilingual(question: str, lang: str, k: int = 5, version: IndexVersion | None = None):
+    """
+    QA against the pre-translated `lang` partition: the question is
+    embedded as is, retrieval returns translated chunks and the LLM
+    answers in `lang` directly. Same events as answer_question_translated
+    (source_text is the sentence itself).
+    """
+    with request_trace(k=k, lang=lang, index=f"lang_{lang}") as trace:
+        start = time.perf_counter()
+        started = time.monotonic()
+        encoder = lang_model.get()
+
+        def encode(sentences):
+            return encode_passages(encoder, sentences)
+
+        with span("embed_query"):
+            qvec = encode_queries(encoder, [question])
+        with versions.acquire(version) as v:
+            partition = v.get(f"index_{lang}")
+            with span("index_search"):
+                scores, indices = partition.index.search(qvec, k)
+            with span("chunk_lookup"):
+                results = lookup_chunks(scores[0], indices[0], partition.store)
+        with span("pack_context"):
+            contexts = pack_context(
+                qvec, results, encode,
+                token_budget=CONTEXT_TOKEN_BUDGET,
+                count_tokens=lambda text: len(encoder.tokenizer.tokenize(text)),
+            )
+        with span("build_prompt"):
+            prompt = build_prompt(question, contexts, language=LANGUAGE_NAMES.get(lang, lang))
+
+        outcome = {
+            "fallback": False,
+            "reason": None,
+            "citations": [{"n": i + 1, "source": c["source"]} for i, c in enumerate(contexts)],
+        }
+        deltas = stream_answer(
+            prompt, trace, lambda reason: fallback_answer(qvec, results, reason, encode=encode), outcome, started
+        )
+        for i, sentence in enumerate(iter_sentences(deltas)):
+            if i == 0:
+                trace.fields["first_sentence_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            yield {"index": i, "text": sentence, "source_text": sentence}
+
+        if outcome["fallback"]:
+            trace.fields["fallback"] = outcome["reason"]
+    # After the trace is closed, as in answer_question_translated
+    yield {"done": True, **outcome}
+
+
+def answer_question_in(question: str, lang: str, k: int = 5):
+    """Answer in `lang`: from its pre-translated partition if built, else via translation-api."""
+    # Pin one version for the whole answer, so a reload in between can't swap
+    # in a version without the partition that was chosen here
+    with versions.acquire() as version:
+        if has_lang_partition(version, lang):
+            yield from answer_question_multilingual(question, lang, k=k, version=version)
+        else:
+            yield from answer_question_translated(question, lang, k=k, version=version)
+
+
+# ----- batch mode -----
+BATCH_EMBED_SIZE = 64
+BATCH_CONCURRENCY = 8
+LLM_RETRIES = 3
+LLM_TIMEOUT_S = 120
+
+
+def call_openrouter_with_retries(prompt: str, retries: int = LLM_RETRIES):
+    """call_openrouter with exponential backoff; returns (answer, attempts)."""
+    for attempt in range(1, retries + 2):
+        try:
+            return call_openrouter(prompt, timeout=LLM_TIMEOUT_S), attempt
+        except (requests.RequestException, KeyError, ValueError) as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            retryable = status is None or status == 429 or status >= 500
+            if attempt > retries or not retryable:
+                raise
+            time.sleep(min(30, 2 ** attempt))
+
+
+def read_questions(path: str) -> list[dict]:
+    """JSONL with {"question": ..., "id"?: ...} per line (plain text lines also work)."""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line) if line.startswith("{") else {"question": line}
+            rec.setdefault("id", n)
+            questions.append(rec)
+    return questions
+
+
+def run_batch(in_path: str, out_path: str, k: int = 5,
+              concurrency: int = BATCH_CONCURRENCY, retries: int = LLM_RETRIES):
+    """
+    Answer every question in a JSONL file:
+      - embed all questions in large batches
+      - one multi-row index.search()
+      - pack contexts, then call the LLM with bounded concurrency + retries
+    Results are written to out_path as JSONL (in completion order, each
+    with its input "index") with per-stage timings.
+    """
+    run_start = time.perf_counter()
+    questions = read_questions(in_path)
+    texts = [q["question"] for q in questions]
+    n = len(texts)
+    print(f"[BATCH] {n} questions, k={k}, concurrency={concurrency}")
+
+    start = time.perf_counter()
+    qvecs = model.get().encode(
+        texts, batch_size=BATCH_EMBED_SIZE, convert_to_numpy=True,
+        normalize_embeddings=True, show_progress_bar=n > BATCH_EMBED_SIZE,
+    ).astype("float32")
+    embed_s = time.perf_counter() - start
+
+    # One index version for the whole batch, even if a reload happens meanwhile
+    with versions.acquire() as version:
+        store = version.get("chunk_store")
+        start = time.perf_counter()
+        scores, indices = search_index(qvecs, k, version)
+        search_s = time.perf_counter() - start
+        print(f"[BATCH] embedded in {embed_s:.2f}s, searched in {search_s:.3f}s")
+
+        prompts = []
+        pack_ms = []
+        for i, question in enumerate(texts):
+            t0 = time.perf_counter()
+            results = lookup_chunks(scores[i], indices[i], store)
+            contexts = pack_context(
+                qvecs[i], results, embed_sentences,
+                token_budget=CONTEXT_TOKEN_BUDGET,
+                count_tokens=count_tokens,
+            )
+            prompts.append((build_prompt(question, contexts), [c["source"] for c in contexts]))
+            pack_ms.append((time.perf_counter() - t0) * 1000)
+
+    def answer(i):
+        t0 = time.perf_counter()
+        try:
+            text, attempts = call_openrouter_with_retries(prompts[i][0], retries)
+            error = None
+        except Exception as e:
+            text, attempts, error = None, retries + 1, repr(e)
+        return i, text, attempts, error, (time.perf_counter() - t0) * 1000
+
+    done = failed = 0
+    with (
+        open(out_path, "w", encoding="utf-8") as out,
+        ThreadPoolExecutor(max_workers=concurrency) as pool,
+    ):
+        futures = [pool.submit(answer, i) for i in range(n)]
+        for fut in as_completed(futures):
+            i, text, attempts, error, llm_ms = fut.result()
+            record = {
+                "index": i,
+                "id": questions[i]["id"],
+                "question": texts[i],
+                "answer": text,
+                "sources": prompts[i][1],
+                "error": error,
+                "attempts": attempts,
+                "timings_ms": {
+                    # batched stages are amortized per question
+                    "embed": round(embed_s * 1000 / n, 3),
+                    "search": round(search_s * 1000 / n, 3),
+                    "pack_context": round(pack_ms[i], 3),
+                    "llm": round(llm_ms, 1),
+                },
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            done += 1
+            failed += error is not None
+            if done % 10 == 0 or done == n:
+                print(f"[BATCH] {done}/{n} answered ({failed} failed)")
+
+    print(f"[BATCH] Done in {time.perf_counter() - run_start:.1f}s → {out_path}")
+
+
 # ----- CLI -----
+def start():
+    """Kick off loading (background mode) and expose the readiness and reload endpoints."""
+    if STARTUP_MODE == "background":
+        register_probe("/ready", startup.status, startup.is_ready)
+        startup.start()
+    else:
+        # lazy: components load on first use, so the process is ready at once
+        register_probe("/ready", startup.status, lambda: True)
+
+    # GET /index: serving version; POST /admin/reload: load the CURRENT version and swap
+    register_probe("/index", versions.status, lambda: True)
+    register_action("/admin/reload", versions.reload)
+    if RELOAD_WATCH_S:
+        versions.watch(RELOAD_WATCH_S)
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", metavar="QUESTIONS_JSONL", help="answer questions from a JSONL file")
+    parser.add_argument("--out", default="answers.jsonl", help="batch output JSONL")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=LLM_RETRIES)
+    parser.add_argument("--lang", default="en",
+                        help="answer language; served from a pre-translated partition when one "
+                             "is built, otherwise streamed through translation-api")
+    args = parser.parse_args()
+
+    start()
+    if args.batch:
+        run_batch(args.batch, args.out, k=args.k, concurrency=args.concurrency, retries=args.retries)
+        return
+
+    start_metrics_server()
+    if STARTUP_MODE == "background":
+        print("[ LOADING ] model, index, metadata, chunk texts...")
+        startup.wait_ready()
+        print(f"[ LOADED ] in {startup.ready_seconds}s {startup.status()['components']}")
     print("[ READY ] Ask medical questions. Type 'exit' to quit.\n")
 
     while True:
@@ -121,12 +799,26 @@ def main():
         if q in ("exit", "quit"):
             break
 
-        results = search_faiss(q, k=5)
-        prompt = build_prompt(q, results)
-        answer = call_openrouter(prompt)
+        if args.lang != "en":
+            print("\nANSWER:\n")
+            # Run the generator to the end so the request finishes normally
+            for event in answer_question_in(q, args.lang, k=args.k):
+                if not event.get("done"):
+                    print(event["text"], flush=True)
+                elif event["fallback"]:
+                    print(f"\n(fallback: {event['reason']}; best-matching passages, not a generated answer)")
+            print("\n" + "="*60 + "\n")
+            continue
+
+        result = answer_question(q, k=args.k)
 
-        print("\nANSWER:\n")
-        print(answer)
+        if result["fallback"]:
+            print(f"\nANSWER (fallback: {result['reason']}; best-matching passages, not a generated answer):\n")
+        else:
+            print("\nANSWER:\n")
+        print(result["answer"])
+        if result["fallback"] and result["citations"]:
+            print("\n" + "\n".join(f"[{c['n']}] {c['source']}" for c in result["citations"]))
         print("\n" + "="*60 + "\n")
 
 
@@ -0,0 +1,223 @@
+# context_packer.py
+"""
+Pack retrieved chunks into a compact, token-budgeted context for the LLM.
+
+search_faiss() returns whole chunks, and neighbouring chunks of the same
+source share ~OVERLAP_CHARS characters (see chunking/04_chunk_texts.py).
+Sending them as-is repeats text and wastes prompt tokens. The packer:
+
+  1. merges adjacent chunks of the same source and drops their overlap
+  2. scores every sentence against the query embedding
+  3. keeps the best sentences until the token budget is used up,
+     then re-emits them per source in their original order
+
+extractive_answer() reuses the same sentence scoring to answer without
+the LLM (the deadline fallback in 07_qa_faiss.py).
+
+Used by:
+    app/07_qa_faiss.py
+"""
+
+import re
+from typing import Callable
+
+import numpy as np
+
+# Must match chunking/04_chunk_texts.py
+OVERLAP_CHARS = 200
+
+# Packing config (you can tweak these)
+CONTEXT_TOKEN_BUDGET = 700     # max tokens of context sent to the LLM
+MIN_SENTENCE_SCORE = 0.25      # drop sentences less similar than this
+GAP_MARKER = " ... "           # joins non-contiguous sentences of one source
+
+# Extractive fallback
+FALLBACK_SENTENCES = 3         # sentences in an extractive answer
+MIN_ANSWER_SENTENCE_CHARS = 40  # skip page chrome ("Lock", "Skip to content")
+
+# End punctuation (plus the Devanagari danda, for the hi partition) or a line break
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Cheap tokenizer-free estimate (~4 characters per token for English).
+    Pass a real tokenizer's counter to pack_context() for exact numbers.
+    """
+    return max(1, len(text) // 4)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _overlap_len(prev: str, nxt: str, max_overlap: int) -> int:
+    """
+    Length of the longest suffix of `prev` that is also a prefix of `nxt`.
+    Chunks are stripped after cutting, so the overlap is usually a little
+    shorter than OVERLAP_CHARS; we search up to a small margin beyond it.
+    """
+    limit = min(len(prev), len(nxt), max_overlap)
+    for k in range(limit, 0, -1):
+        if prev.endswith(nxt[:k]):
+            return k
+    return 0
+
+
+def merge_adjacent_chunks(contexts, overlap: int = OVERLAP_CHARS):
+    """
+    Merge chunks from the same source with consecutive chunk_index values
+    into a single span, removing the duplicated overlap.
+
+    Returns a list of spans ordered by their best retrieval score:
+        {"source", "chunk_indices", "score", "text"}
+    """
+    by_source: dict[str, list] = {}
+    for c in contexts:
+        by_source.setdefault(c["source"], []).append(c)
+
+    spans = []
+    for source, chunks in by_source.items():
+        chunks = sorted(chunks, key=lambda c: c["chunk_index"])
+        current = None
+        for c in chunks:
+            if current is not None and c["chunk_index"] == current["chunk_indices"][-1] + 1:
+                k = _overlap_len(current["text"], c["text"], overlap + 50)
+                current["text"] += ("" if k else "\n") + c["text"][k:]
+                current["chunk_indices"].append(c["chunk_index"])
+                current["score"] = max(current["score"], c["score"])
+                continue
+            if current is not None:
+                spans.append(current)
+            current = {
+                "source": source,
+                "chunk_indices": [c["chunk_index"]],
+                "score": c["score"],
+                "text": c["text"],
+            }
+        if current is not None:
+            spans.append(current)
+
+    spans.sort(key=lambda s: s["score"], reverse=True)
+    return spans
+
+
+def pack_context(
+    query_vec: np.ndarray,
+    contexts,
+    encode: Callable[[list[str]], np.ndarray],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    count_tokens: Callable[[str], int] = approx_token_count,
+    min_score: float = MIN_SENTENCE_SCORE,
+):
+    """
+    Turn search_faiss() results into packed contexts for build_prompt().
+
+    `query_vec` is the normalized query embedding (1 x dim or dim,).
+    `encode` must return normalized embeddings for a list of sentences,
+    e.g. lambda s: model.encode(s, normalize_embeddings=True).
+
+    Returns a list of {"source", "chunk_indices", "score", "text", "tokens"}.
+    """
+    spans = merge_adjacent_chunks(contexts)
+    if not spans:
+        return []
+
+    # ---- sentence candidates across all spans ----
+    candidates = []  # (span_idx, sent_idx, sentence)
+    span_sentences = []
+    for si, span in enumerate(spans):
+        sents = split_sentences(span["text"])
+        span_sentences.append(sents)
+        for j, sent in enumerate(sents):
+            candidates.append((si, j, sent))
+
+    # Whole context already fits: skip the encode call entirely
+    span_tokens = [count_tokens(s["text"]) for s in spans]
+    if sum(span_tokens) <= token_budget:
+        return [dict(s, tokens=t) for s, t in zip(spans, span_tokens)]
+
+    sent_vecs = encode([c[2] for c in candidates])
+    qv = np.asarray(query_vec, dtype="float32").reshape(-1)
+    scores = np.asarray(sent_vecs, dtype="float32") @ qv
+
+    # ---- greedy fill by sentence relevance ----
+    chosen: dict[int, set[int]] = {}
+    used = 0
+    for ci in np.argsort(-scores):
+        si, j, sent = candidates[ci]
+        if chosen and scores[ci] < min_score:
+            break
+        cost = count_tokens(sent)
+        if used + cost > token_budget:
+            continue
+        chosen.setdefault(si, set()).add(j)
+        used += cost
+
+    # ---- re-assemble in source order ----
+    packed = []
+    for si, span in enumerate(spans):
+        keep = sorted(chosen.get(si, ()))
+        if not keep:
+            continue
+        parts = [span_sentences[si][keep[0]]]
+        for prev, j in zip(keep, keep[1:]):
+            sep = " " if j == prev + 1 else GAP_MARKER
+            parts.append(sep + span_sentences[si][j])
+        text = "".join(parts)
+        packed.append({
+            "source": span["source"],
+            "chunk_indices": span["chunk_indices"],
+            "score": span["score"],
+            "text": text,
+            "tokens": count_tokens(text),
+        })
+    return packed
+
+
+def extractive_answer(
+    query_vec: np.ndarray,
+    contexts,
+    encode: Callable[[list[str]], np.ndarray],
+    max_sentences: int = FALLBACK_SENTENCES,
+    min_score: float = MIN_SENTENCE_SCORE,
+):
+    """
+    Answer from the retrieved text alone: the sentences most similar to
+    the query, each followed by a [n] citation of its source.
+
+    Returns {"answer", "citations": [{"n", "source"}]}; the answer is empty
+    when nothing relevant was retrieved.
+    """
+    spans = merge_adjacent_chunks(contexts)
+    candidates = []  # (source, sentence)
+    for span in spans:
+        for sent in split_sentences(span["text"]):
+            if len(sent) >= MIN_ANSWER_SENTENCE_CHARS and " " in sent:
+                candidates.append((span["source"], sent))
+    if not candidates:
+        return {"answer": "", "citations": []}
+
+    sent_vecs = encode([c[1] for c in candidates])
+    qv = np.asarray(query_vec, dtype="float32").reshape(-1)
+    scores = np.asarray(sent_vecs, dtype="float32") @ qv
+
+    citations: dict[str, int] = {}
+    parts = []
+    seen = set()
+    for ci in np.argsort(-scores):
+        source, sent = candidates[ci]
+        if parts and scores[ci] < min_score:
+            break
+        if sent in seen:
+            continue
+        seen.add(sent)
+        n = citations.setdefault(source, len(citations) + 1)
+        parts.append(f"{sent} [{n}]")
+        if len(parts) >= max_sentences:
+            break
+
+    return {
+        "answer": " ".join(parts),
+        "citations": [{"n": n, "source": s} for s, n in citations.items()],
+    }
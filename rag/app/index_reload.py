@@ -0,0 +1,199 @@
+# index_reload.py
+"""
+Hot reload of the index and chunk store without restarting the QA process.
+
+Everything tied to one index version (FAISS index, chunk store, document
+index, language partitions) is an IndexVersion: a set of LazyComponents
+loaded from one version directory (see index_versions.py). Requests pin
+the active version for their whole lifetime:
+
+    with versions.acquire() as v:
+        v.get("index").search(...)
+        v.get("chunk_store").lookup(...)
+
+VersionManager.reload() loads the new version in a background thread
+(every component, then a warm-up query), and swaps the active pointer
+only once that is done. Requests already running finish on the version
+they pinned. The old version is released once its last request ends.
+
+Reloads are triggered by VersionManager.watch() (polling the CURRENT
+pointer) or by POST /admin/reload on the metrics port (see qa_metrics.py).
+
+Used by:
+    app/07_qa_faiss.py
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from startup import LazyComponent
+
+DRAIN_WARN_S = 60.0   # log if the old version still has requests after this long
+
+
+class IndexVersion:
+    def __init__(self, name: str, path: str, components: list[LazyComponent]):
+        self.name = name
+        self.path = path
+        self.components = {c.name: c for c in components}
+        self.inflight = 0
+        self.loaded_seconds: float | None = None
+
+    def get(self, component: str):
+        return self.components[component].get()
+
+    def has(self, component: str) -> bool:
+        return component in self.components
+
+    def load(self):
+        """Load every component concurrently and wait for all of them."""
+        start = time.perf_counter()
+        for c in self.components.values():
+            c.start()
+        for c in self.components.values():
+            c.get()
+        self.loaded_seconds = round(time.perf_counter() - start, 3)
+
+    def release(self):
+        # Drop the loaded objects so their memory (and mmaps) go away with
+        # the last reference, even if something still holds this version
+        for c in self.components.values():
+            c.value = None
+            c.status = "released"
+
+    def info(self) -> dict:
+        return {
+            "version": self.name,
+            "path": self.path,
+            "inflight": self.inflight,
+            "components": {name: c.info() for name, c in self.components.items()},
+        }
+
+
+class VersionManager:
+    def __init__(
+        self,
+        initial: IndexVersion,
+        open_version: Callable[[str], IndexVersion],
+        resolve: Callable[[], str],
+        warmup: Callable[[IndexVersion], object] | None = None,
+    ):
+        """
+        open_version(name) builds the (unloaded) IndexVersion for a version
+        name; resolve() returns the name of the version that should be live.
+        """
+        self.active = initial
+        self.open_version = open_version
+        self.resolve = resolve
+        self.warmup = warmup
+        self.loading: str | None = None
+        self.draining: dict[str, int] = {}
+        self.last_reload: dict | None = None
+        self.reloads = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def acquire(self, pinned: IndexVersion | None = None):
+        """Pin the active version (or `pinned`, if already held) for one request."""
+        if pinned is not None:
+            yield pinned
+            return
+        with self._cond:
+            version = self.active
+            version.inflight += 1
+        try:
+            yield version
+        finally:
+            with self._cond:
+                version.inflight -= 1
+                if version.inflight == 0:
+                    self._cond.notify_all()
+
+    def reload(self, name: str | None = None) -> dict:
+        """Start loading `name` (default: resolve()) in the background."""
+        with self._cond:
+            target = name or self.resolve()
+            if self.loading is not None:
+                return {"started": False, "reason": f"already loading {self.loading}", **self.status()}
+            if target == self.active.name:
+                return {"started": False, "reason": "already serving this version", **self.status()}
+            self.loading = target
+        threading.Thread(target=self._reload, args=(target,), daemon=True, name=f"reload-{target}").start()
+        return {"started": True, "target": target, **self.status()}
+
+    def _reload(self, target: str):
+        start = time.perf_counter()
+        print(f"[RELOAD] Loading index version {target}...")
+        try:
+            new = self.open_version(target)
+            new.load()
+            if self.warmup is not None:
+                self.warmup(new)
+        except BaseException as e:
+            with self._cond:
+                self.loading = None
+                self.last_reload = {"version": target, "ok": False, "error": repr(e)}
+            print(f"[RELOAD] Failed to load {target}, still serving {self.active.name}: {e!r}")
+            return
+
+        with self._cond:
+            old, self.active = self.active, new
+            self.loading = None
+            self.reloads += 1
+            self.draining[old.name] = old.inflight
+            self.last_reload = {
+                "version": target,
+                "ok": True,
+                "previous": old.name,
+                "load_seconds": round(time.perf_counter() - start, 3),
+            }
+        print(f"[RELOAD] Now serving {target} (was {old.name}), loaded in {self.last_reload['load_seconds']}s")
+        self._drain(old)
+
+    def _drain(self, old: IndexVersion):
+        start = time.monotonic()
+        warned = False
+        with self._cond:
+            while old.inflight:
+                self.draining[old.name] = old.inflight
+                self._cond.wait(1.0)
+                if not warned and time.monotonic() - start > DRAIN_WARN_S:
+                    print(f"[RELOAD] {old.inflight} requests still running on {old.name}")
+                    warned = True
+            self.draining.pop(old.name, None)
+        old.release()
+        print(f"[RELOAD] Released {old.name} after {time.monotonic() - start:.2f}s drain")
+
+    def watch(self, interval_s: float):
+        """Poll resolve() and reload whenever it names a different version."""
+        def loop():
+            failed = None
+            while True:
+                time.sleep(interval_s)
+                try:
+                    target = self.resolve()
+                except OSError:
+                    continue
+                # Don't retry a broken version every interval; wait for a newer one
+                if target == self.active.name or target == failed or self.loading:
+                    continue
+                self.reload(target)
+                while self.loading:
+                    time.sleep(0.1)
+                last = self.last_reload or {}
+                failed = target if last.get("version") == target and not last.get("ok") else None
+
+        threading.Thread(target=loop, daemon=True, name="index-watch").start()
+        print(f"[RELOAD] Watching for new index versions every {interval_s:g}s")
+
+    def status(self) -> dict:
+        return {
+            "version": self.active.name,
+            "inflight": self.active.inflight,
+            "loading": self.loading,
+            "draining": dict(self.draining),
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+        }
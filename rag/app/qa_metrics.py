@@ -0,0 +1,284 @@
+# qa_metrics.py
+"""
+Low-overhead latency instrumentation for the QA path.
+
+    with span("embed_query"):
+        ...
+
+Every span feeds a latency histogram (qa_stage_seconds{stage=...}) and,
+when a request trace is active, the per-request trace. Counters cover
+cache hits/misses and LLM token usage. Everything is exposed in
+Prometheus text format:
+
+    QA_METRICS_PORT=9100   -> GET http://host:9100/metrics
+                              (plus probes added with register_probe and
+                              POST admin actions added with register_action)
+    QA_TRACE_LOG=path      -> one JSON line per request ("-" for stderr)
+
+A span costs two perf_counter() calls and one short locked update, so
+this is meant to stay on in production.
+
+Used by:
+    app/07_qa_faiss.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets in seconds: 1ms .. 60s (LLM calls are slow)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_PORT = int(os.environ.get("QA_METRICS_PORT", "0"))
+TRACE_LOG = os.environ.get("QA_TRACE_LOG", "")
+# Bearer token for POST admin actions; without one they only accept localhost
+ADMIN_TOKEN = os.environ.get("QA_ADMIN_TOKEN", "")
+
+
+def _label_str(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = [(k, list(v)) for k, v in self.series.items()]
+        for key, s in items:
+            cumulative = 0
+            for le, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_str(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(key)} {s[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_str(key)} {s[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.lock = threading.Lock()
+        self.series: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = list(self.series.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_label_str(key)} {v:g}")
+        return lines
+
+
+# ----- registry -----
+STAGE_SECONDS = Histogram("qa_stage_seconds", "Latency of each QA stage.")
+REQUEST_SECONDS = Histogram("qa_request_seconds", "End-to-end latency of a QA request.")
+REQUESTS = Counter("qa_requests_total", "QA requests by outcome.")
+CACHE = Counter("qa_cache_total", "Cache lookups by cache and result (hit/miss).")
+LLM_TOKENS = Counter("qa_llm_tokens_total", "LLM tokens by kind (prompt/completion).")
+SHARD_PARTIAL = Counter("qa_shard_partial_total", "Sharded searches answered without every shard.")
+FALLBACKS = Counter("qa_fallback_total", "Answers served by the extractive fallback, by reason.")
+
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, CACHE, LLM_TOKENS, SHARD_PARTIAL, FALLBACKS]
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ----- per-request traces -----
+_current_trace: ContextVar["RequestTrace | None"] = ContextVar("qa_trace", default=None)
+_trace_lock = threading.Lock()
+
+
+class RequestTrace:
+    def __init__(self, **fields):
+        self.id = uuid.uuid4().hex[:12]
+        self.start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.fields = fields
+        # Spans may end in worker threads (streamed translation)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "ts": time.time(),
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            **self.fields,
+        }
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed)
+
+
+@contextmanager
+def request_trace(**fields):
+    """Wrap one QA request; records end-to-end latency and writes the trace log."""
+    trace = RequestTrace(**fields)
+    token = _current_trace.set(trace)
+    outcome = "ok"
+    try:
+        yield trace
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        REQUEST_SECONDS.observe(time.perf_counter() - trace.start)
+        REQUESTS.inc(outcome=outcome)
+        trace.fields["outcome"] = outcome
+        if TRACE_LOG:
+            _write_trace(trace.to_dict())
+
+
+def current_trace() -> "RequestTrace | None":
+    return _current_trace.get()
+
+
+def _write_trace(record: dict):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _trace_lock:
+        if TRACE_LOG == "-":
+            sys.stderr.write(line)
+        else:
+            with open(TRACE_LOG, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_llm_usage(usage: dict | None):
+    if not usage:
+        return
+    prompt = usage.get("prompt_tokens", 0)
+    completion = usage.get("completion_tokens", 0)
+    LLM_TOKENS.inc(prompt, kind="prompt")
+    LLM_TOKENS.inc(completion, kind="completion")
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fields["prompt_tokens"] = prompt
+        trace.fields["completion_tokens"] = completion
+
+
+# ----- /metrics endpoint + probes -----
+_probes: dict[str, tuple] = {}
+
+
+def register_probe(path: str, status_fn, ok_fn):
+    """
+    Serve status_fn() as JSON at `path` on the metrics port, with HTTP 200
+    when ok_fn() is true and 503 otherwise (e.g. a readiness probe).
+    """
+    _probes[path] = (status_fn, ok_fn)
+
+
+_actions: dict[str, object] = {}
+
+
+def register_action(path: str, action_fn):
+    """Run action_fn() on POST `path` and return its result as JSON (e.g. /admin/reload)."""
+    _actions[path] = action_fn
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def _send(self, code: int, body: bytes, content_type: str):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body = render_prometheus().encode("utf-8")
+            self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+        elif path in _probes:
+            status_fn, ok_fn = _probes[path]
+            body = json.dumps(status_fn()).encode("utf-8")
+            self._send(200 if ok_fn() else 503, body, "application/json")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path not in _actions:
+            self.send_error(404)
+            return
+        if ADMIN_TOKEN:
+            allowed = self.headers.get("Authorization", "") == f"Bearer {ADMIN_TOKEN}"
+        else:
+            allowed = self.client_address[0] in ("127.0.0.1", "::1")
+        if not allowed:
+            self.send_error(403)
+            return
+        body = json.dumps(_actions[path]()).encode("utf-8")
+        self._send(200, body, "application/json")
+
+    def log_message(self, *args):
+        pass  # keep the CLI quiet
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve /metrics from a daemon thread. No-op when port is 0."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="qa-metrics").start()
+    print(f"[METRICS] Serving Prometheus metrics on :{port}/metrics")
+    return server
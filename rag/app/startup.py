@@ -0,0 +1,131 @@
+# startup.py
+"""
+Parallel, lazy cold start for the QA process.
+
+Each heavy piece of state (SBERT model, FAISS index, metadata, chunk
+texts) is a LazyComponent wrapping a loader function. Loaders do their
+own heavy imports (torch, sentence_transformers, faiss), so nothing is
+paid at module import.
+
+    background: Startup.start() runs every loader in its own thread,
+                then a warm-up query, then marks the process ready
+    lazy:       nothing starts up front; each component loads on
+                first get()
+
+Readiness is exposed through Startup.status() (see the /ready probe in
+qa_metrics.py).
+
+Used by:
+    app/07_qa_faiss.py
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class LazyComponent:
+    def __init__(self, name: str, loader: Callable[[], object]):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.error: BaseException | None = None
+        self.status = "pending"  # pending | loading | ready | failed
+        self.seconds: float | None = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            self.value = self.loader()
+            self.status = "ready"
+        except BaseException as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            self.seconds = round(time.perf_counter() - start, 3)
+            self._done.set()
+
+    def _claim(self) -> bool:
+        """Return True if the caller should run the loader."""
+        with self._lock:
+            if self.status != "pending":
+                return False
+            self.status = "loading"
+            return True
+
+    def start(self):
+        """Begin loading in a background thread (no-op if already started)."""
+        if self._claim():
+            threading.Thread(target=self._load, daemon=True, name=f"load-{self.name}").start()
+
+    def get(self, timeout: float | None = None):
+        """Return the loaded value, loading it in this thread if nobody started it yet."""
+        if not self._done.is_set():
+            if self._claim():
+                self._load()
+            elif not self._done.wait(timeout):
+                raise TimeoutError(f"{self.name} is still loading")
+        if self.error is not None:
+            raise RuntimeError(f"failed to load {self.name}") from self.error
+        return self.value
+
+    def info(self) -> dict:
+        info = {"status": self.status, "seconds": self.seconds}
+        if self.error is not None:
+            info["error"] = repr(self.error)
+        return info
+
+
+class Startup:
+    def __init__(self, components: list[LazyComponent], warmup: Callable[[], object] | None = None):
+        self.components = {c.name: c for c in components}
+        self.warmup = warmup
+        self.warmup_seconds: float | None = None
+        self.error: BaseException | None = None
+        self.started_at: float | None = None
+        self.ready_seconds: float | None = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """Load every component concurrently, then warm up, then mark ready."""
+        self.started_at = time.perf_counter()
+        for c in self.components.values():
+            c.start()
+        threading.Thread(target=self._finish, daemon=True, name="startup-warmup").start()
+
+    def _finish(self):
+        try:
+            for c in self.components.values():
+                c.get()
+            if self.warmup is not None:
+                start = time.perf_counter()
+                self.warmup()
+                self.warmup_seconds = round(time.perf_counter() - start, 3)
+            self.ready_seconds = round(time.perf_counter() - self.started_at, 3)
+            self._ready.set()
+        except BaseException as e:
+            self.error = e
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until ready; raises if a component or the warm-up failed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._ready.wait(0.1):
+            if self.error is not None:
+                raise RuntimeError("startup failed") from self.error
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "ready_seconds": self.ready_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": repr(self.error) if self.error is not None else None,
+            "components": {name: c.info() for name, c in self.components.items()},
+        }
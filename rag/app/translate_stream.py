@@ -0,0 +1,130 @@
+# translate_stream.py
+"""
+Pipelined translation of a streamed LLM answer.
+
+    LLM deltas -> iter_sentences() -> translate each sentence as soon as it
+    is complete (in a small thread pool) -> yield translations in order
+
+So the first translated sentence reaches the user while the LLM is still
+generating, and translation overlaps generation instead of following it.
+Sentences go to translation-api's POST /translate one by one; its batcher
+groups concurrent sentences into one generate() call and its cache serves
+repeats (see translation-api/batcher.py, cache.py).
+
+Used by:
+    app/07_qa_faiss.py (--lang)
+"""
+
+import contextvars
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+import requests
+
+# Sentence end (. ! ? or the Devanagari danda, keeping trailing "[n]" citations)
+# followed by whitespace, or a line break
+_BOUNDARY_RE = re.compile(r"(?<=[.!?।])((?:\s*\[\d+\])*)\s+(?!\[\d)|\n+")
+
+MIN_SENTENCE_CHARS = 20   # shorter pieces ("e.g.", "1.") are merged with the next one
+TRANSLATE_WORKERS = 4     # sentences in flight to translation-api at once
+TRANSLATE_TIMEOUT_S = 30
+
+
+def iter_sentences(deltas: Iterable[str], min_chars: int = MIN_SENTENCE_CHARS) -> Iterator[str]:
+    """Re-chunk a stream of text deltas into complete sentences."""
+    buf = ""
+    for delta in deltas:
+        buf += delta
+        start = 0
+        for m in _BOUNDARY_RE.finditer(buf):
+            if m.end() == len(buf):
+                break  # wait for the next delta: it may start with a "[n]" citation
+            sentence = (buf[start:m.start()] + (m.group(1) or "")).strip()
+            if len(sentence) < min_chars:
+                continue  # keep it in the buffer; it joins the next sentence
+            yield sentence
+            start = m.end()
+        buf = buf[start:]
+    tail = buf.strip()
+    if tail:
+        yield tail
+
+
+_DONE = object()
+
+
+def pipelined(items: Iterable[str], fn: Callable[[str], str], workers: int = TRANSLATE_WORKERS,
+              on_close: Callable[[], None] | None = None) -> Iterator[tuple[str, str]]:
+    """
+    Apply fn to each item in a thread pool as soon as it arrives and yield
+    (item, fn(item)) in input order, each as early as possible.
+
+    `items` is consumed by a background thread, so a slow producer (the
+    LLM) never holds back results that are already done. That thread and
+    the fn calls run in copies of the caller's context (contextvars), so
+    the request trace sees their spans and token usage. on_close() runs
+    when the consumer finishes or stops early; use it to cancel a
+    producer blocked on I/O, which can only check for stop between items.
+    """
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+    handoff: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                handoff.put((item, pool.submit(contextvars.copy_context().run, fn, item)))
+        except BaseException as e:
+            handoff.put(e)
+        finally:
+            handoff.put(_DONE)
+
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), daemon=True, name="translate-feed",
+    ).start()
+    try:
+        while True:
+            entry = handoff.get()
+            if entry is _DONE:
+                break
+            if isinstance(entry, BaseException):
+                raise entry
+            item, fut = entry
+            yield item, fut.result()
+    finally:
+        stop.set()
+        if on_close is not None:
+            on_close()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class TranslationClient:
+    """Minimal client for translation-api's POST /translate."""
+
+    def __init__(self, url: str, timeout: float = TRANSLATE_TIMEOUT_S, tier: str = "fast"):
+        self.url = url
+        self.timeout = timeout
+        self.tier = tier
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def translate(self, text: str, src: str, tgt: str) -> str:
+        if not text or src == tgt:
+            return text
+        resp = self._session().post(
+            self.url,
+            json={"text": text, "source_lang": src, "target_lang": tgt, "tier": self.tier},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["translation"]
@@ -0,0 +1,240 @@
+# bench_chunking.py
+"""
+Chunk size / overlap sweep: cost vs retrieval quality.
+
+Re-chunks a sample of data_text_clean/ under a grid of settings and, for
+each one, embeds the chunks with the production encoder, builds the same
+IndexFlatIP as 05_build_faiss_index.py and measures:
+
+    chunks, text bytes (drives Node export size), share of chunks longer
+    than the encoder's max_seq_length (silently truncated), encode time,
+    index bytes, average context tokens for the top-k (what build_prompt
+    sends), and recall@k
+
+Settings:
+    chars:SIZE/OVERLAP    04_chunk_texts.smart_char_chunks (the current chunker)
+    tokens:MAX/OVERLAP    sentence-packing chunker bounded by encoder tokens
+
+Queries are self-supervised and independent of the chunking: sentences
+(and "...?" headings) sampled from the documents. A query counts as a hit
+at k when a top-k chunk contains it (chunk recall) or comes from the
+same document (doc recall).
+
+Run from rag/:
+    (venv) python benchmarks/bench_chunking.py --max-docs 400 --queries 400
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from common import BASE_DIR, SENTENCE_RE, environment, load_stage, make_queries, write_json
+
+TEXT_DIR = os.path.join(BASE_DIR, "data_text_clean")
+
+# Must match embeddings/05_build_faiss_index.py
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Grid (you can tweak these)
+CHAR_SETTINGS = [(600, 100), (900, 150), (1200, 0), (1200, 200), (1200, 400), (1600, 200), (2000, 300)]
+TOKEN_SETTINGS = [(128, 0), (128, 32), (256, 32), (256, 64)]
+
+
+# ----- corpus + queries -----
+def load_docs(text_dir: str, max_docs: int, seed: int) -> list[tuple[str, str]]:
+    paths = []
+    for root, _, files in os.walk(text_dir):
+        for fname in sorted(files):
+            if fname.endswith(".txt"):
+                paths.append(os.path.join(root, fname))
+    paths.sort()
+    if len(paths) > max_docs:
+        paths = random.Random(seed).sample(paths, max_docs)
+    docs = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read().strip()
+        if text:
+            docs.append((os.path.relpath(p, text_dir), text))
+    return docs
+
+
+# ----- chunkers -----
+def char_chunker(smart_char_chunks, size: int, overlap: int):
+    return lambda text, tokenizer: smart_char_chunks(text, chunk_size=size, overlap=overlap)
+
+
+def token_chunker(max_tokens: int, overlap_tokens: int):
+    """Pack whole sentences up to max_tokens; carry trailing sentences as overlap."""
+    def chunk(text: str, tokenizer) -> list[str]:
+        sents = [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+        lens = [len(tokenizer.tokenize(s)) for s in sents]
+        chunks, current, used = [], [], 0
+        for sent, n in zip(sents, lens):
+            if current and used + n > max_tokens:
+                chunks.append(" ".join(s for s, _ in current))
+                # Keep the tail of this chunk (up to overlap_tokens) as the start of the next
+                carry, carried = [], 0
+                for s, m in reversed(current):
+                    if carried + m > overlap_tokens:
+                        break
+                    carry.insert(0, (s, m))
+                    carried += m
+                current, used = carry, carried
+            current.append((sent, n))
+            used += n
+        if current:
+            chunks.append(" ".join(s for s, _ in current))
+        return chunks
+    return chunk
+
+
+def settings_grid(char_settings, token_settings):
+    smart_char_chunks = load_stage("04_chunk").smart_char_chunks
+    grid = [(f"chars:{s}/{o}", char_chunker(smart_char_chunks, s, o)) for s, o in char_settings]
+    grid += [(f"tokens:{t}/{o}", token_chunker(t, o)) for t, o in token_settings]
+    return grid
+
+
+# ----- evaluation -----
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def evaluate(name, chunker, docs, queries, model, k: int) -> dict:
+    tokenizer = model.tokenizer
+    max_seq = model.max_seq_length
+
+    texts, chunk_doc = [], []
+    for d, (_, text) in enumerate(docs):
+        for c in chunker(text, tokenizer):
+            texts.append(c)
+            chunk_doc.append(d)
+    chunk_doc = np.array(chunk_doc)
+    token_lens = [len(tokenizer.tokenize(t)) for t in texts]
+
+    start = time.perf_counter()
+    xb = model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True).astype("float32")
+    encode_s = time.perf_counter() - start
+
+    index = faiss.IndexFlatIP(xb.shape[1])
+    index.add(xb)
+    index_bytes = int(faiss.serialize_index(index).nbytes)
+
+    xq = model.encode([q["text"] for q in queries], batch_size=64,
+                      convert_to_numpy=True, normalize_embeddings=True).astype("float32")
+    _, found = index.search(xq, k)
+
+    norm_texts = [_normalize(t) for t in texts]
+    chunk_hits = doc_hits = 0
+    context_tokens = []
+    for q, row in zip(queries, found):
+        row = [int(i) for i in row if i >= 0]
+        needle = _normalize(q["text"])
+        chunk_hits += any(chunk_doc[i] == q["doc"] and needle in norm_texts[i] for i in row)
+        doc_hits += any(chunk_doc[i] == q["doc"] for i in row)
+        context_tokens.append(sum(token_lens[i] for i in row))
+
+    n = len(queries)
+    return {
+        "setting": name,
+        "chunks": len(texts),
+        "chunks_per_doc": round(len(texts) / len(docs), 2),
+        "text_bytes": sum(len(t.encode("utf-8")) for t in texts),
+        "avg_chunk_tokens": round(float(np.mean(token_lens)), 1),
+        "truncated_share": round(sum(t > max_seq for t in token_lens) / len(texts), 4),
+        "encode_s": round(encode_s, 3),
+        "index_bytes": index_bytes,
+        "avg_context_tokens": round(float(np.mean(context_tokens)), 1),
+        "chunk_recall": round(chunk_hits / n, 4),
+        "doc_recall": round(doc_hits / n, 4),
+    }
+
+
+def cheapest_within(rows: list[dict], tolerance: float) -> dict | None:
+    """
+    Cheapest setting whose chunk recall is within tolerance of the best.
+
+    Cost is counted, not timed, so the pick is the same on every run:
+    fewest chunks (index size, vectors to encode), then fewest text bytes
+    (overlap re-encoded), then smallest LLM context. encode_s is only
+    reported.
+    """
+    if not rows:
+        return None
+    best = max(r["chunk_recall"] for r in rows)
+    ok = [r for r in rows if r["chunk_recall"] >= best - tolerance]
+    return min(ok, key=lambda r: (r["chunks"], r["text_bytes"], r["avg_context_tokens"]))
+
+
+def print_table(rows: list[dict], k: int):
+    print(f"\n{'setting':<18} {'chunks':>7} {'trunc':>6} {'encode s':>9} {'index MB':>9} "
+          f"{'ctx tok':>8} {f'chunk R@{k}':>10} {f'doc R@{k}':>8}")
+    for r in rows:
+        print(f"{r['setting']:<18} {r['chunks']:>7} {r['truncated_share']:>6.1%} {r['encode_s']:>9.2f} "
+              f"{r['index_bytes'] / 1e6:>9.2f} {r['avg_context_tokens']:>8.0f} "
+              f"{r['chunk_recall']:>10.3f} {r['doc_recall']:>8.3f}")
+
+
+def parse_pairs(spec: str) -> list[tuple[int, int]]:
+    """Parse "1200/200,900/150" into [(1200, 200), (900, 150)]."""
+    pairs = []
+    for item in spec.split(","):
+        if item.strip():
+            size, overlap = item.split("/")
+            pairs.append((int(size), int(overlap)))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--text-dir", default=TEXT_DIR)
+    parser.add_argument("--max-docs", type=int, default=400)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chars", default=",".join(f"{s}/{o}" for s, o in CHAR_SETTINGS),
+                        help="char settings SIZE/OVERLAP,...")
+    parser.add_argument("--tokens", default=",".join(f"{t}/{o}" for t, o in TOKEN_SETTINGS),
+                        help="token settings MAX/OVERLAP,... (empty to skip)")
+    parser.add_argument("--recall-tolerance", type=float, default=0.01,
+                        help="recommend the cheapest setting within this chunk recall of the best")
+    parser.add_argument("--out", default="bench/chunking_results.json")
+    args = parser.parse_args()
+
+    docs = load_docs(args.text_dir, args.max_docs, args.seed)
+    queries = make_queries([text for _, text in docs], args.queries, args.seed)
+    for q in queries:
+        q["doc"] = q.pop("source")
+    print(f"[CHUNKING] {len(docs)} documents, {len(queries)} queries, k={args.k}")
+
+    model = SentenceTransformer(MODEL_NAME)
+    rows = []
+    for name, chunker in settings_grid(parse_pairs(args.chars), parse_pairs(args.tokens)):
+        row = evaluate(name, chunker, docs, queries, model, args.k)
+        rows.append(row)
+        print(f"[CHUNKING] {name}: {row['chunks']} chunks, encode {row['encode_s']}s, "
+              f"chunk R@{args.k} {row['chunk_recall']}")
+
+    print_table(rows, args.k)
+    pick = cheapest_within(rows, args.recall_tolerance)
+    if pick:
+        print(f"\n[CHUNKING] Cheapest within {args.recall_tolerance} of best recall: {pick['setting']}")
+
+    write_json(args.out, {
+        "environment": environment(),
+        "config": vars(args),
+        "model": MODEL_NAME,
+        "max_seq_length": model.max_seq_length,
+        "results": rows,
+        "recommended": pick["setting"] if pick else None,
+    })
+
+
+if __name__ == "__main__":
+    main()
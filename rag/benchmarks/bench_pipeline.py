@@ -0,0 +1,253 @@
+# bench_pipeline.py
+"""
+End-to-end throughput benchmark for the offline RAG pipeline.
+
+Generates a synthetic corpus (see synthetic_corpus.py), runs stages
+02-06 on it in a scratch directory (the real data_* folders are never
+touched), then micro-benchmarks the hot functions:
+
+    clean_text, smart_char_chunks, BeautifulSoup extraction, model.encode
+
+Results are written as JSON (documents/s, chunks/s, embeddings/s, peak
+RSS) and can be compared against a saved baseline.
+
+Run from rag/:
+    (venv) python benchmarks/bench_pipeline.py --docs 300 --out bench/results.json
+    (venv) python benchmarks/bench_pipeline.py --baseline bench/baseline.json --fail-on-regression
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import (
+    count_jsonl_lines,
+    environment,
+    load_stage,
+    peak_rss_mb,
+    timed,
+    write_json,
+)
+from synthetic_corpus import generate_corpus
+
+ALL_STAGES = ["02", "03", "04", "05", "06"]
+
+# Which metric of each entry is compared against the baseline (higher = better)
+THROUGHPUT_KEY = "items_per_s"
+
+
+# ----- stages -----
+def run_stage(name: str, unit: str, fn, n_items=None) -> dict:
+    result = {"unit": unit}
+    with timed(result):
+        items = fn()
+    items = n_items if n_items is not None else items
+    result["items"] = items
+    result[THROUGHPUT_KEY] = round(items / result["seconds"], 2) if result["seconds"] else None
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(f"[BENCH] {name}: {items} {unit} in {result['seconds']}s "
+          f"({result[THROUGHPUT_KEY]} {unit}/s, peak RSS {result['peak_rss_mb']} MB)")
+    return result
+
+
+def bench_stages(work: str, stages: list[str], n_docs: int) -> dict:
+    raw = os.path.join(work, "data_raw")
+    text = os.path.join(work, "data_text")
+    clean = os.path.join(work, "data_text_clean")
+    chunks = os.path.join(work, "data_chunks")
+    index_dir = os.path.join(work, "vectorstore")
+    os.makedirs(index_dir, exist_ok=True)
+
+    results = {}
+
+    if "02" in stages:
+        m = load_stage("02_extract")
+        m.RAW_DIR, m.TEXT_DIR = raw, text
+        results["02_extract"] = run_stage("02_extract", "documents", m.main, n_docs)
+
+    if "03" in stages:
+        m = load_stage("03_clean")
+        m.INPUT_TEXT_DIR, m.OUTPUT_TEXT_DIR = text, clean
+        results["03_clean"] = run_stage("03_clean", "documents", m.main, n_docs)
+
+    if "04" in stages:
+        m = load_stage("04_chunk")
+        m.INPUT_TEXT_DIR, m.OUTPUT_CHUNK_DIR = clean, chunks
+
+        def chunk():
+            m.main()
+            return count_jsonl_lines(chunks)
+
+        results["04_chunk"] = run_stage("04_chunk", "chunks", chunk)
+
+    if "05" in stages:
+        load = {}
+        with timed(load):
+            m = load_stage("05_index")
+        m.CHUNKS_DIR = chunks
+        m.CHECKPOINT_DIR = os.path.join(index_dir, "checkpoints")
+
+        def build():
+            m.build_faiss_index(index_dir, restart=True)
+            return count_jsonl_lines(index_dir)
+
+        results["05_index"] = run_stage("05_index", "embeddings", build)
+        results["05_index"]["model_load_seconds"] = load["seconds"]
+        results["05_index"]["index_bytes"] = os.path.getsize(os.path.join(index_dir, "index.faiss"))
+
+    if "06" in stages:
+        m = load_stage("06_export")
+        m.CHUNKS_DIR = Path(chunks)
+        m.META_PATH = Path(index_dir) / "metadata.jsonl"
+        m.OUT_DIR = Path(work) / "backend_data"
+        m.OUT_PATH = m.OUT_DIR / "medlineplus_embeddings.jsonl"
+
+        def export():
+            m.main()
+            return count_jsonl_lines(str(m.OUT_DIR))
+
+        results["06_export"] = run_stage("06_export", "embeddings", export)
+        results["06_export"]["output_bytes"] = os.path.getsize(m.OUT_PATH)
+
+    return results
+
+
+# ----- micro-benchmarks -----
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def micro_result(name: str, unit: str, ops: int, seconds: float) -> dict:
+    r = {"unit": unit, "items": ops, "seconds": round(seconds, 4),
+         THROUGHPUT_KEY: round(ops / seconds, 2) if seconds else None}
+    print(f"[MICRO] {name}: {r[THROUGHPUT_KEY]} {unit}/s")
+    return r
+
+
+def bench_micro(work: str, repeat: int, with_encode: bool) -> dict:
+    raw_files = sorted(glob.glob(os.path.join(work, "data_raw", "**", "*.html"), recursive=True))[:100]
+    results = {}
+
+    m02 = load_stage("02_extract")
+    scratch = Path(work) / "micro_extract"
+    scratch.mkdir(exist_ok=True)
+
+    def extract():
+        for i, p in enumerate(raw_files):
+            m02.extract_html_to_txt(Path(p), scratch / f"{i}.txt")
+
+    results["extract_html_to_txt"] = micro_result(
+        "extract_html_to_txt", "documents", len(raw_files), best_of(extract, repeat))
+
+    texts = [p.read_text(encoding="utf-8") for p in sorted(scratch.glob("*.txt"))]
+    n_chars = sum(len(t) for t in texts)
+
+    m03 = load_stage("03_clean")
+    results["clean_text"] = micro_result(
+        "clean_text", "chars", n_chars, best_of(lambda: [m03.clean_text(t) for t in texts], repeat))
+
+    cleaned = [m03.clean_text(t) for t in texts]
+    m04 = load_stage("04_chunk")
+    results["smart_char_chunks"] = micro_result(
+        "smart_char_chunks", "chars", sum(len(t) for t in cleaned),
+        best_of(lambda: [m04.smart_char_chunks(t) for t in cleaned], repeat))
+
+    if with_encode:
+        from sentence_transformers import SentenceTransformer
+
+        chunks = [c for t in cleaned for c in m04.smart_char_chunks(t)][:256]
+        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        model.encode(chunks[:8])  # warm-up
+        results["model_encode"] = micro_result(
+            "model_encode", "embeddings", len(chunks),
+            best_of(lambda: model.encode(chunks, batch_size=32, normalize_embeddings=True), repeat))
+
+    return results
+
+
+# ----- baseline comparison -----
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print throughput ratios vs baseline; return the names that regressed."""
+    regressions = []
+    print(f"\n{'metric':<34}{'baseline':>16}{'current':>16}{'ratio':>8}")
+    for section in ("stages", "micro"):
+        for name, cur in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if not base or not base.get(THROUGHPUT_KEY) or not cur.get(THROUGHPUT_KEY):
+                continue
+            ratio = cur[THROUGHPUT_KEY] / base[THROUGHPUT_KEY]
+            flag = ""
+            if ratio < 1 - tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{section}.{name}")
+            print(f"{section + '.' + name:<34}{base[THROUGHPUT_KEY]:>16.1f}{cur[THROUGHPUT_KEY]:>16.1f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=300, help="synthetic pages to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(ALL_STAGES),
+                        help="comma-separated stages to run (default: 02,03,04,05,06)")
+    parser.add_argument("--skip-embed", action="store_true",
+                        help="skip stages 05/06 and the encode micro-benchmark (no SBERT needed)")
+    parser.add_argument("--repeat", type=int, default=3, help="micro-benchmark repetitions (best-of)")
+    parser.add_argument("--workdir", help="scratch dir (default: a temp dir, removed afterwards)")
+    parser.add_argument("--out", default="bench/pipeline_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed throughput drop vs baseline before flagging (0.15 = 15%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    if args.skip_embed:
+        stages = [s for s in stages if s not in ("05", "06")]
+
+    work = args.workdir or tempfile.mkdtemp(prefix="rag_bench_")
+    try:
+        raw = os.path.join(work, "data_raw")
+        gen = {}
+        with timed(gen):
+            counts = generate_corpus(raw, args.docs, args.seed)
+        print(f"[BENCH] Synthetic corpus: {sum(counts.values())} pages in {gen['seconds']}s → {raw}")
+
+        results = {
+            "env": environment(),
+            "config": {"docs": args.docs, "seed": args.seed, "stages": stages, "repeat": args.repeat},
+            "stages": bench_stages(work, stages, args.docs),
+            "micro": bench_micro(work, args.repeat, with_encode=not args.skip_embed),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        if not args.workdir:
+            shutil.rmtree(work, ignore_errors=True)
+
+    write_json(args.out, results)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[BENCH] {len(regressions)} regression(s): {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("\n[BENCH] No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
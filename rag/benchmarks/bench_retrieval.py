@@ -0,0 +1,230 @@
+# bench_retrieval.py
+"""
+Recall-vs-latency benchmark for retrieval index configurations.
+
+Ground truth is the exact IndexFlatIP over the reference encoder (the one
+05_build_faiss_index.py uses). Queries are derived from the corpus
+itself, no labels needed (see common.make_queries):
+    - sentences: a sentence taken verbatim from an indexed chunk
+    - headings: short question/title lines ("What side effects can ...?")
+The chunk a query was taken from is in the index (queries are not held
+out), so self_hit@k, the share of queries whose own chunk is retrieved,
+is a sanity check on each setting rather than a measure of relevance.
+
+For every (encoder, index) setting in the grid we measure:
+    recall@k vs ground truth, self_hit@k, build time, index bytes,
+    p50/p95/p99 single-query latency (encode + search), batched QPS
+and print the Pareto front of recall vs p95 latency.
+
+Run from rag/:
+    (venv) python benchmarks/bench_retrieval.py --max-chunks 20000 --queries 500
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from common import BASE_DIR, environment, make_queries, write_json
+
+CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
+
+# Must match embeddings/05_build_faiss_index.py
+REFERENCE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Grid (you can tweak these). Index settings are faiss.index_factory
+# strings plus optional search-time parameters for faiss.ParameterSpace.
+ENCODERS = [
+    REFERENCE_MODEL,
+    "sentence-transformers/paraphrase-MiniLM-L3-v2",
+]
+INDEXES = [
+    ("Flat", ""),
+    ("SQ8", ""),
+    ("HNSW32", "efSearch=32"),
+    ("HNSW32", "efSearch=128"),
+    ("IVF{nlist},Flat", "nprobe=4"),
+    ("IVF{nlist},Flat", "nprobe=16"),
+    ("IVF{nlist},SQ8", "nprobe=16"),
+    ("IVF{nlist},PQ{m}", "nprobe=16"),
+]
+
+
+# ----- corpus + queries -----
+def load_chunks(chunks_dir: str, max_chunks: int, seed: int) -> list[dict]:
+    records = []
+    for root, _, files in os.walk(chunks_dir):
+        for fname in sorted(files):
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(os.path.join(root, fname), "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+    if len(records) > max_chunks:
+        records = random.Random(seed).sample(records, max_chunks)
+    return records
+
+
+# ----- indexes -----
+def build_index(factory: str, params: str, xb: np.ndarray):
+    n, dim = xb.shape
+    nlist = max(16, int(4 * np.sqrt(n)))
+    m = next(m for m in (48, 32, 24, 16, 8, 4) if dim % m == 0)
+    spec = factory.format(nlist=nlist, m=m)
+
+    start = time.perf_counter()
+    index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(xb)
+    index.add(xb)
+    build_s = time.perf_counter() - start
+
+    if params:
+        faiss.ParameterSpace().set_index_parameters(index, params)
+
+    index_bytes = int(faiss.serialize_index(index).nbytes)
+    return index, spec, build_s, index_bytes
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def self_hit_at_k(found: np.ndarray, source_rows: list[int]) -> float:
+    """Share of queries whose source chunk is among the results."""
+    return sum(row in f for f, row in zip(found, source_rows)) / len(source_rows)
+
+
+def measure(index, model, queries: list[str], xq: np.ndarray, k: int) -> dict:
+    # single query: encode + search, one at a time (the QA path)
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        qv = model.encode([q], convert_to_numpy=True, normalize_embeddings=True).astype("float32")
+        index.search(qv, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # search-only single query latency
+    search_lat = []
+    for i in range(len(xq)):
+        start = time.perf_counter()
+        index.search(xq[i:i + 1], k)
+        search_lat.append((time.perf_counter() - start) * 1000)
+
+    # batched
+    start = time.perf_counter()
+    _, found = index.search(xq, k)
+    batch_s = time.perf_counter() - start
+
+    p = np.percentile(latencies, [50, 95, 99])
+    sp = np.percentile(search_lat, [50, 95, 99])
+    return {
+        "found": found,
+        "p50_ms": round(float(p[0]), 3),
+        "p95_ms": round(float(p[1]), 3),
+        "p99_ms": round(float(p[2]), 3),
+        "search_p50_ms": round(float(sp[0]), 4),
+        "search_p95_ms": round(float(sp[1]), 4),
+        "search_p99_ms": round(float(sp[2]), 4),
+        "batched_qps": round(len(xq) / batch_s, 1) if batch_s else None,
+    }
+
+
+def pareto_front(rows: list[dict]) -> list[dict]:
+    """Settings not dominated on (higher recall, lower p95 latency)."""
+    front = []
+    for r in rows:
+        dominated = any(
+            o is not r
+            and o["recall"] >= r["recall"] and o["p95_ms"] <= r["p95_ms"]
+            and (o["recall"] > r["recall"] or o["p95_ms"] < r["p95_ms"])
+            for o in rows
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["p95_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks-dir", default=CHUNKS_DIR)
+    parser.add_argument("--max-chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="faiss OpenMP threads (0 = default)")
+    parser.add_argument("--encoders", default=",".join(ENCODERS))
+    parser.add_argument("--out", default="bench/retrieval_results.json")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+
+    records = load_chunks(args.chunks_dir, args.max_chunks, args.seed)
+    queries = make_queries([rec["text"] for rec in records], args.queries, args.seed)
+    q_texts = [q["text"] for q in queries]
+    q_rows = [q["source"] for q in queries]  # row of the query's chunk in xb
+    texts = [r["text"] for r in records]
+    print(f"[RETRIEVAL] {len(records)} chunks, {len(queries)} queries, k={args.k}")
+
+    truth = None
+    rows = []
+    for enc_name in [e.strip() for e in args.encoders.split(",") if e.strip()]:
+        model = SentenceTransformer(enc_name)
+
+        start = time.perf_counter()
+        xb = model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True).astype("float32")
+        encode_s = time.perf_counter() - start
+        xq = model.encode(q_texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True).astype("float32")
+        print(f"[RETRIEVAL] {enc_name}: dim={xb.shape[1]}, corpus encode {encode_s:.1f}s")
+
+        if truth is None:
+            # Ground truth: exact search with the reference (first) encoder
+            flat = faiss.IndexFlatIP(xb.shape[1])
+            flat.add(xb)
+            _, truth = flat.search(xq, args.k)
+
+        for factory, params in INDEXES:
+            index, spec, build_s, index_bytes = build_index(factory, params, xb)
+            m = measure(index, model, q_texts, xq, args.k)
+            found = m.pop("found")
+            row = {
+                "encoder": enc_name,
+                "index": spec,
+                "params": params,
+                "recall": round(recall_at_k(found, truth), 4),
+                "self_hit": round(self_hit_at_k(found, q_rows), 4),
+                "build_s": round(build_s, 3),
+                "index_bytes": index_bytes,
+                "corpus_encode_s": round(encode_s, 2),
+                **m,
+            }
+            rows.append(row)
+            print(f"[RETRIEVAL] {spec:<22} {params:<14} recall@{args.k}={row['recall']:.3f} "
+                  f"self_hit={row['self_hit']:.3f} p95={row['p95_ms']}ms qps={row['batched_qps']} bytes={index_bytes}")
+
+    front = pareto_front(rows)
+    print("\n[RETRIEVAL] Pareto front (recall vs p95 latency):")
+    for r in front:
+        print(f"  {r['encoder'].split('/')[-1]:<26} {r['index']:<22} {r['params']:<14} "
+              f"recall={r['recall']:.3f} p95={r['p95_ms']}ms")
+
+    write_json(args.out, {
+        "env": environment(),
+        "config": {"chunks": len(records), "queries": len(queries), "k": args.k, "seed": args.seed},
+        "query_kinds": {kind: sum(q["kind"] == kind for q in queries) for kind in ("sentence", "heading")},
+        "results": rows,
+        "pareto_front": [{"encoder": r["encoder"], "index": r["index"], "params": r["params"]} for r in front],
+    })
+
+
+if __name__ == "__main__":
+    main()
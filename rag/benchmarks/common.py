@@ -0,0 +1,108 @@
+# common.py
+"""
+Small helpers shared by the benchmark scripts in rag/benchmarks/.
+"""
+
+import importlib.util
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+# This file is in rag/benchmarks/, so go up one level to rag/
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from profiling import peak_rss_mb  # noqa: E402,F401  (re-exported for the benchmarks)
+
+# Pipeline stages (file names start with digits, so they can't be imported normally)
+STAGES = {
+    "02_extract": "extracting/02_extract_text.py",
+    "03_clean": "cleaning/03_clean_texts.py",
+    "04_chunk": "chunking/04_chunk_texts.py",
+    "05_index": "embeddings/05_build_faiss_index.py",
+    "06_export": "06_export_node_embeddings.py",
+    "07_qa": "app/07_qa_faiss.py",
+}
+
+
+def load_stage(stage: str):
+    """Import a numbered pipeline script as a module, e.g. load_stage("04_chunk")."""
+    path = os.path.join(BASE_DIR, STAGES[stage])
+    # Let the stage import its sibling helper modules (e.g. app/context_packer.py)
+    stage_dir = os.path.dirname(path)
+    if stage_dir not in sys.path:
+        sys.path.insert(0, stage_dir)
+    spec = importlib.util.spec_from_file_location(f"stage_{stage}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextmanager
+def timed(result: dict, key: str = "seconds"):
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result[key] = round(time.perf_counter() - start, 4)
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print(f"[BENCH] Wrote results → {path}")
+
+
+def count_jsonl_lines(root: str) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        for fname in files:
+            if fname.endswith(".jsonl"):
+                with open(os.path.join(dirpath, fname), "r", encoding="utf-8") as f:
+                    total += sum(1 for line in f if line.strip())
+    return total
+
+
+# ----- queries -----
+# Sentence boundaries: end punctuation or a line break (headings, list items)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def make_queries(texts: list[str], n: int, seed: int) -> list[dict]:
+    """
+    Held-out queries from random texts: a question-style heading ("...?")
+    40% of the time when the text has one, else a sentence. Each query is
+    {"kind": "heading"|"sentence", "text", "source": index into texts}.
+    Shared so every benchmark scores the same kind of queries.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for i in rng.sample(range(len(texts)), len(texts)):
+        text = texts[i]
+        lines = [l.strip() for l in text.splitlines() if l.strip()]
+        headings = [l for l in lines if l.endswith("?") and 15 <= len(l) <= 120]
+        if headings and rng.random() < 0.4:
+            queries.append({"kind": "heading", "text": rng.choice(headings), "source": i})
+        else:
+            sents = [s.strip() for s in SENTENCE_RE.split(text)
+                     if 40 <= len(s.strip()) <= 300 and len(s.split()) >= 6]
+            if not sents:
+                continue
+            queries.append({"kind": "sentence", "text": rng.choice(sents), "source": i})
+        if len(queries) >= n:
+            break
+    return queries
@@ -0,0 +1,254 @@
+# load_test.py
+"""
+Open-loop load generator for the QA path and the translation service.
+
+Requests arrive as a Poisson process at each offered rate in --rates,
+for --duration seconds per step, with at most --concurrency in flight.
+Latency is measured from each request's scheduled arrival, so time spent
+queued behind a saturated service counts (no coordinated omission).
+
+Targets:
+    retrieval  - 07_qa_faiss.search_faiss() in this process (embed + search + lookup)
+    qa         - 07_qa_faiss.answer_question() in this process; the LLM call
+                 goes to OPENROUTER_URL (use --mock for a local stand-in)
+    translate  - POST {--url}/translate on a running translation-api
+
+Per step we report achieved throughput, p50/p95/p99/max latency and the
+error rate. The saturation point is the first step where throughput falls
+below 90% of the offered rate, p95 exceeds --slo-p95-ms, or errors exceed
+--max-error-rate; the step before it is the highest sustainable rate.
+
+Run from rag/:
+    (venv) python benchmarks/load_test.py --target qa --mock --rates 1,2,4,8 --duration 30
+    (venv) python benchmarks/load_test.py --target translate --url http://127.0.0.1:8000 --rates 5,10,20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from common import BASE_DIR, environment, load_stage, write_json
+from mock_openrouter import add_mock_args, config_from_args, start_mock_server
+
+DEFAULT_QUESTIONS = [
+    "What are the side effects of ibuprofen?",
+    "How is type 2 diabetes treated?",
+    "What are the symptoms of dengue fever?",
+    "Can I take paracetamol during pregnancy?",
+    "How does high blood pressure damage the kidneys?",
+    "What vaccines do adults need?",
+    "What causes iron deficiency anemia?",
+    "How long does the flu last?",
+]
+
+DEFAULT_TEXTS = [
+    "Take one tablet twice a day with food.",
+    "Call your doctor if the fever lasts more than three days.",
+    "Drink plenty of water and rest. Avoid alcohol while taking this medicine.",
+    "Keep this medicine out of the reach of children.",
+    "Wash your hands often with soap and water for at least 20 seconds.",
+]
+
+THROUGHPUT_FLOOR = 0.9  # achieved / offered below this = saturated
+
+
+# ----- corpus -----
+def load_corpus(path: str | None, target: str) -> list[str]:
+    """Plain text lines, or JSONL with a "question" or "text" field."""
+    if not path:
+        return DEFAULT_TEXTS if target == "translate" else DEFAULT_QUESTIONS
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                rec = json.loads(line)
+                line = rec.get("question") or rec.get("text") or ""
+            if line:
+                items.append(line)
+    return items
+
+
+# ----- targets -----
+def make_qa_call(target: str, k: int):
+    qa = load_stage("07_qa")
+    print("[LOAD] Loading QA state...")
+    qa.start()
+    if qa.STARTUP_MODE != "background":
+        # QA_STARTUP=lazy never starts loading; load up front so the run measures a warm process
+        qa.startup.start()
+    qa.startup.wait_ready()
+    print(f"[LOAD] QA ready in {qa.startup.ready_seconds}s")
+    if target == "retrieval":
+        return lambda q: qa.search_faiss(q, k=k)
+    return lambda q: qa.answer_question(q, k=k)
+
+
+def make_translate_call(url: str, src: str, tgt: str, timeout: float):
+    local = threading.local()
+
+    def call(text: str):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        resp = session.post(
+            url.rstrip("/") + "/translate",
+            json={"text": text, "source_lang": src, "target_lang": tgt},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    return call
+
+
+# ----- load generation -----
+async def run_step(call, corpus: list[str], rate: float, duration: float,
+                   concurrency: int, pool: ThreadPoolExecutor, seed: int) -> dict:
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+
+    async def one(item: str, scheduled: float):
+        async with sem:
+            try:
+                await loop.run_in_executor(pool, call, item)
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                key = f"http_{status}" if status else type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+                return
+        latencies.append(loop.time() - scheduled)
+
+    start = loop.time()
+    tasks = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t > duration:
+            break
+        await asyncio.sleep(max(0.0, start + t - loop.time()))
+        tasks.append(asyncio.create_task(one(corpus[len(tasks) % len(corpus)], start + t)))
+    await asyncio.gather(*tasks)
+    wall = loop.time() - start
+
+    sent = len(tasks)
+    n_errors = sum(errors.values())
+    lat_ms = np.array(latencies) * 1000
+    pct = (lambda p: round(float(np.percentile(lat_ms, p)), 1)) if len(lat_ms) else (lambda p: None)
+    return {
+        "offered_rps": rate,
+        "sent": sent,
+        "ok": len(latencies),
+        "errors": errors,
+        "error_rate": round(n_errors / sent, 4) if sent else 0.0,
+        "wall_s": round(wall, 2),
+        "achieved_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(float(lat_ms.max()), 1) if len(lat_ms) else None,
+    }
+
+
+def saturation(steps: list[dict], slo_p95_ms: float | None, max_error_rate: float) -> dict:
+    for i, step in enumerate(steps):
+        reasons = []
+        if step["achieved_rps"] < THROUGHPUT_FLOOR * step["offered_rps"]:
+            reasons.append("throughput")
+        if slo_p95_ms and (step["p95_ms"] is None or step["p95_ms"] > slo_p95_ms):
+            reasons.append("p95")
+        if step["error_rate"] > max_error_rate:
+            reasons.append("errors")
+        if reasons:
+            return {
+                "saturated_at_rps": step["offered_rps"],
+                "reasons": reasons,
+                "max_sustainable_rps": steps[i - 1]["offered_rps"] if i else None,
+            }
+    return {"saturated_at_rps": None, "reasons": [], "max_sustainable_rps": steps[-1]["offered_rps"] if steps else None}
+
+
+def print_table(steps: list[dict]):
+    print(f"\n{'offered/s':>10} {'achieved/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for s in steps:
+        print(f"{s['offered_rps']:>10g} {s['achieved_rps']:>11.2f} {s['p50_ms'] or '-':>9} "
+              f"{s['p95_ms'] or '-':>9} {s['p99_ms'] or '-':>9} {s['error_rate']:>8.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["retrieval", "qa", "translate"], default="qa")
+    parser.add_argument("--rates", default="1,2,4,8", help="comma-separated offered rates (requests/s)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per rate step")
+    parser.add_argument("--concurrency", type=int, default=32, help="max requests in flight")
+    parser.add_argument("--corpus", help="questions/texts: plain lines or JSONL with question/text")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="translation-api base URL")
+    parser.add_argument("--src", default="en")
+    parser.add_argument("--tgt", default="hi")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--slo-p95-ms", type=float, default=None)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--mock", action="store_true", help="serve a local OpenRouter stand-in for --target qa")
+    add_mock_args(parser)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    corpus = load_corpus(args.corpus, args.target)
+
+    mock_url = None
+    if args.mock:
+        _, mock_url = start_mock_server(config_from_args(args))
+        # 07_qa_faiss reads these at import
+        os.environ["OPENROUTER_URL"] = mock_url
+        os.environ.setdefault("OPENROUTER_API_KEY", "mock")
+        print(f"[LOAD] Mock OpenRouter at {mock_url}")
+
+    if args.target == "translate":
+        call = make_translate_call(args.url, args.src, args.tgt, args.timeout)
+    else:
+        call = make_qa_call(args.target, args.k)
+
+    steps = []
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="load") as pool:
+        for i, rate in enumerate(rates):
+            print(f"[LOAD] {args.target}: {rate:g} req/s for {args.duration:g}s...")
+            step = asyncio.run(run_step(call, corpus, rate, args.duration, args.concurrency, pool, args.seed + i))
+            steps.append(step)
+            print(f"[LOAD]   achieved {step['achieved_rps']} req/s, p95 {step['p95_ms']} ms, "
+                  f"errors {step['error_rate']:.2%}")
+
+    print_table(steps)
+    sat = saturation(steps, args.slo_p95_ms, args.max_error_rate)
+    if sat["saturated_at_rps"] is None:
+        print(f"\n[LOAD] Not saturated up to {rates[-1]:g} req/s")
+    else:
+        print(f"\n[LOAD] Saturated at {sat['saturated_at_rps']:g} req/s ({', '.join(sat['reasons'])}); "
+              f"max sustainable {sat['max_sustainable_rps']} req/s")
+
+    out = args.out or os.path.join(BASE_DIR, "bench", f"load_{args.target}.json")
+    write_json(out, {
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "mock_url": mock_url,
+        "steps": steps,
+        "saturation": sat,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# mock_openrouter.py
+"""
+Local stand-in for the OpenRouter chat-completions endpoint, for load tests.
+
+    POST /api/v1/chat/completions
+
+Answers after a configurable delay, shaped like a real LLM call:
+    time to first token (--ttft-ms) + tokens x per-token time (--token-ms),
+    each with +/- --jitter relative noise
+With "stream": true it sends server-sent events (one chunk per token,
+then "data: [DONE]"), otherwise one JSON body with "usage". --error-rate
+returns a random 429/500 for that share of requests.
+
+Run standalone from rag/:
+    (venv) python benchmarks/mock_openrouter.py --port 8099 --ttft-ms 400 --token-ms 15
+    (venv) OPENROUTER_URL=http://127.0.0.1:8099/api/v1/chat/completions python app/07_qa_faiss.py
+or let benchmarks/load_test.py start it in-process with --mock.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Common side effects include nausea, headache and dizziness. "
+    "Stop the medicine and seek medical care if you notice swelling, "
+    "trouble breathing or a severe rash. Ask your doctor or pharmacist "
+    "before combining it with other medicines."
+)
+
+
+class MockConfig:
+    def __init__(self, ttft_ms: float = 400, token_ms: float = 15, tokens: int = 60,
+                 jitter: float = 0.2, error_rate: float = 0.0, seed: int | None = None):
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self, ms: float) -> float:
+        with self.lock:
+            noise = self.rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, ms * (1 + noise)) / 1000
+
+    def failure_status(self) -> int | None:
+        with self.lock:
+            if self.rng.random() < self.error_rate:
+                return self.rng.choice([429, 500])
+        return None
+
+
+def _tokens(n: int) -> list[str]:
+    words = ANSWER.split(" ")
+    return [(words[i % len(words)] + " ") for i in range(n)]
+
+
+def make_handler(config: MockConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+            prompt_tokens = sum(len(m.get("content", "").split()) for m in req.get("messages", []))
+
+            time.sleep(config.sample(config.ttft_ms))
+            status = config.failure_status()
+            if status is not None:
+                self._send_json(status, {"error": {"message": "mock failure"}})
+                return
+
+            tokens = _tokens(config.tokens)
+            if req.get("stream"):
+                self._stream(req, tokens)
+            else:
+                time.sleep(config.sample(config.token_ms * len(tokens)))
+                self._send_json(200, {
+                    "id": f"mock-{uuid.uuid4().hex[:12]}",
+                    "model": req.get("model", "mock"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                              "total_tokens": prompt_tokens + len(tokens)},
+                })
+
+        def _send_json(self, code: int, data: dict):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, req: dict, tokens: list[str]):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            stream_id = f"mock-{uuid.uuid4().hex[:12]}"
+            try:
+                for i, tok in enumerate(tokens):
+                    if i:
+                        time.sleep(config.sample(config.token_ms))
+                    chunk = {"id": stream_id, "model": req.get("model", "mock"),
+                             "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # client cancelled
+
+        def _write_chunk(self, data: bytes):
+            # One HTTP chunk per event, so clients see each token as it is sent
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_mock_server(config: MockConfig, host: str = "127.0.0.1", port: int = 0):
+    """Serve the mock from a daemon thread; returns (server, chat-completions URL)."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-openrouter").start()
+    url = f"http://{host}:{server.server_address[1]}/api/v1/chat/completions"
+    return server, url
+
+
+def add_mock_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--ttft-ms", type=float, default=400, help="mock time to first token")
+    parser.add_argument("--token-ms", type=float, default=15, help="mock time per generated token")
+    parser.add_argument("--tokens", type=int, default=60, help="mock tokens per answer")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative +/- noise on mock delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock requests that fail")
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(args.ttft_ms, args.token_ms, args.tokens, args.jitter, args.error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_mock_args(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config_from_args(args)))
+    server.daemon_threads = True
+    print(f"[MOCK] OpenRouter stand-in on http://{args.host}:{args.port}/api/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
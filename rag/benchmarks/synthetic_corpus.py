@@ -0,0 +1,180 @@
+# synthetic_corpus.py
+"""
+Generate a synthetic raw HTML corpus shaped like our crawled pages
+(MedlinePlus drug info + encyclopedia, WHO fact sheets, CDC topics).
+
+Pages carry the same chrome as the real ones (gov banner, nav, header,
+footer, share/cite boilerplate) around a main body of sections and
+paragraphs, so every pipeline stage does realistic work. Deterministic
+for a given seed; no network needed.
+
+Output layout (same as data_raw/):
+    <out>/medlineplus_drugs/*.html
+    <out>/medlineplus_encyclopedia/*.html
+    <out>/who/*.html
+    <out>/cdc/*.html
+
+Run from rag/:
+    (venv) python benchmarks/synthetic_corpus.py --out /tmp/synth_raw --docs 500
+"""
+
+import argparse
+import os
+import random
+
+# Rough mix of our real corpus (~6,000 pages)
+SOURCE_MIX = {
+    "medlineplus_drugs": 0.33,
+    "medlineplus_encyclopedia": 0.58,
+    "who": 0.08,
+    "cdc": 0.01,
+}
+
+WORDS = (
+    "patient doctor medicine dose tablet infection bacteria virus symptom fever pain "
+    "blood pressure heart kidney liver lung skin allergy reaction treatment therapy "
+    "diabetes insulin glucose vaccine child adult pregnancy breastfeeding risk disease "
+    "chronic acute condition hospital clinic test diagnosis surgery injury nutrition "
+    "water food exercise sleep stress weight cancer tumor screening prevention health "
+    "side effect nausea vomiting diarrhea headache dizziness rash swelling breathing "
+    "cough throat fatigue weakness muscle joint bone vision hearing mental care"
+).split()
+
+DRUG_SECTIONS = [
+    "Why is this medication prescribed?",
+    "How should this medicine be used?",
+    "Other uses for this medicine",
+    "What special precautions should I follow?",
+    "What special dietary instructions should I follow?",
+    "What should I do if I forget a dose?",
+    "What side effects can this medication cause?",
+    "What should I know about storage and disposal of this medication?",
+    "In case of emergency/overdose",
+    "What other information should I know?",
+    "Brand names",
+]
+ENCY_SECTIONS = ["Causes", "Symptoms", "Exams and Tests", "Treatment", "Outlook (Prognosis)",
+                 "Possible Complications", "When to Contact a Medical Professional", "Prevention"]
+WHO_SECTIONS = ["Key facts", "Overview", "Scope of the problem", "Symptoms", "Treatment",
+                "Prevention", "WHO response"]
+CDC_SECTIONS = ["Overview", "Signs and Symptoms", "Risk Factors", "Prevention", "Resources"]
+
+GOV_BANNER = """<section class="usa-banner"><div class="usa-banner__inner">
+<p>An official website of the United States government</p><p>Here's how you know</p>
+<p>Official websites use .gov</p><p>A</p><p>.gov</p>
+<p>website belongs to an official government organization in the United States.</p>
+<p>Secure .gov websites use HTTPS</p><p>A</p><p>lock</p><p>(</p><p>Locked padlock icon</p>
+<p>) or</p><p>https://</p><p>means you've safely connected to the .gov website.
+Share sensitive information only on official, secure websites.</p></div></section>"""
+
+NAV = """<header id="mplus-header"><a href="#start">Skip navigation</a></header>
+<nav id="mplus-nav"><ul>{items}</ul></nav>"""
+
+FOOTER = """<footer id="mplus-footer"><ul>{items}</ul>
+<p>U.S. National Library of Medicine 8600 Rockville Pike, Bethesda, MD 20894</p>
+<p>U.S. Department of Health and Human Services National Institutes of Health</p></footer>"""
+
+SHARE = """<div class="page-actions"><p>To use the sharing features on this page, please enable JavaScript.</p>
+<p>URL of this page: https://example.gov/{slug}.html</p><p>Learn how to cite this page</p></div>"""
+
+
+def sentence(rng: random.Random, n_min: int = 8, n_max: int = 24) -> str:
+    words = rng.choices(WORDS, k=rng.randint(n_min, n_max))
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ".", "?"])
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(2, 7)))
+
+
+def nav_items(rng: random.Random, n: int) -> str:
+    return "".join(f'<li><a href="/{w}.html">{w.title()}</a></li>' for w in rng.sample(WORDS, n))
+
+
+def body_sections(rng: random.Random, sections: list[str]) -> str:
+    parts = []
+    for title in sections:
+        paras = []
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.25:
+                items = "".join(f"<li>{sentence(rng, 4, 10)}</li>" for _ in range(rng.randint(3, 8)))
+                paras.append(f"<ul>{items}</ul>")
+            else:
+                paras.append(f"<p>{paragraph(rng)}</p>")
+        parts.append(
+            f'<div class="section"><div class="section-header"><h2 class="section-title">{title}</h2></div>'
+            f'<div class="section-body">{"".join(paras)}</div></div>'
+        )
+    return "\n".join(parts)
+
+
+def render_page(rng: random.Random, kind: str, slug: str) -> str:
+    title = " ".join(rng.sample(WORDS, 2)).title()
+    if kind == "medlineplus_drugs":
+        sections = DRUG_SECTIONS
+        main_id = 'id="mplus-content"'
+    elif kind == "medlineplus_encyclopedia":
+        sections = rng.sample(ENCY_SECTIONS, rng.randint(4, len(ENCY_SECTIONS)))
+        main_id = 'id="mplus-content"'
+    elif kind == "who":
+        sections = WHO_SECTIONS
+        main_id = 'class="sf-detail-body-wrapper"'
+    else:
+        sections = CDC_SECTIONS
+        main_id = 'class="cdc-dfe-body"'
+
+    intro = f"<p>{paragraph(rng)}</p>"
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}: Synthetic Health Page</title>
+<style>body {{ font-family: sans-serif; }} .section {{ margin: 1em; }}</style>
+<script>window.dataLayer = window.dataLayer || []; function gtag() {{ dataLayer.push(arguments); }}</script>
+</head><body>
+{GOV_BANNER}
+{NAV.format(items=nav_items(rng, 12))}
+<div {main_id}><div id="breadcrumbs"><p>You Are Here:</p><a href="/">Home</a></div>
+<article><h1>{title}</h1>{intro}
+{SHARE.format(slug=slug)}
+{body_sections(rng, sections)}
+</article>
+<aside class="related"><h3>Related topics</h3><ul>{nav_items(rng, 6)}</ul></aside></div>
+{FOOTER.format(items=nav_items(rng, 10))}
+<script src="/js/app.js"></script>
+</body></html>
+"""
+
+
+def generate_corpus(out_dir: str, n_docs: int, seed: int = 0) -> dict[str, int]:
+    """Write n_docs synthetic pages under out_dir; returns counts per source."""
+    rng = random.Random(seed)
+    counts = {}
+    remaining = n_docs
+    kinds = list(SOURCE_MIX)
+    for i, kind in enumerate(kinds):
+        n = remaining if i == len(kinds) - 1 else round(n_docs * SOURCE_MIX[kind])
+        n = min(n, remaining)
+        remaining -= n
+        counts[kind] = n
+
+        folder = os.path.join(out_dir, kind)
+        os.makedirs(folder, exist_ok=True)
+        for j in range(n):
+            slug = f"{kind}_{j:06d}"
+            with open(os.path.join(folder, f"synthetic_{slug}.html"), "w", encoding="utf-8") as f:
+                f.write(render_page(rng, kind, slug))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="output dir (data_raw-style layout)")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate_corpus(args.out, args.docs, args.seed)
+    print(f"[SYNTH] Wrote {sum(counts.values())} pages → {args.out} {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,10 +24,14 @@ Run from project root (rag/):
 
 import os
 import json
+import sys
 from pathlib import Path
 
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import run_stage  # noqa: E402  (lives in rag/)
+
 # This file is in rag/chunking/, so go up one level to rag/
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
@@ -105,10 +109,11 @@ def smart_char_chunks(
     return chunks
 
 
-def process_file(in_path: Path, rel: Path):
+def process_file(in_path: Path, rel: Path) -> int:
     """
     Read one cleaned .txt file, chunk it, and write JSONL file
     into data_chunks/ with same relative path (but .jsonl extension).
+    Returns the number of chunks written.
     """
     out_rel = rel.with_suffix(".jsonl")
     out_path = Path(OUTPUT_CHUNK_DIR) / out_rel
@@ -129,9 +134,12 @@ def process_file(in_path: Path, rel: Path):
             }
             f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
+    return len(chunks)
+
 
 def main():
     ensure_dir(OUTPUT_CHUNK_DIR)
+    total_chunks = 0
 
     for root, _, files in os.walk(INPUT_TEXT_DIR):
         for fname in tqdm(files, desc=f"Chunking in {root}"):
@@ -141,8 +149,10 @@ def main():
             in_path = Path(root) / fname
             rel = in_path.relative_to(INPUT_TEXT_DIR)
 
-            process_file(in_path, rel)
+            total_chunks += process_file(in_path, rel)
+
+    return total_chunks
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("04_chunk", main, unit="chunks")
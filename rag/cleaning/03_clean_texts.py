@@ -1,9 +1,13 @@
 # 03_clean_texts.py
 import os
 import re
+import sys
 from pathlib import Path
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import run_stage  # noqa: E402  (lives in rag/)
+
 # This file is in rag/cleaning/ (or rag/extracting/), so go up one level to rag/
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
@@ -106,6 +110,7 @@ def clean_text(text: str) -> str:
 
 def main():
     ensure_dir(OUTPUT_TEXT_DIR)
+    processed = 0
 
     for root, _, files in os.walk(INPUT_TEXT_DIR):
         for fname in tqdm(files, desc=f"Cleaning in {root}"):
@@ -125,7 +130,10 @@ def main():
 
             with open(out_path, "w", encoding="utf-8") as f:
                 f.write(cleaned)
+            processed += 1
+
+    return processed
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("03_clean", main, unit="documents")
@@ -0,0 +1,135 @@
+# doc_index.py
+"""
+Document-level centroid index for coarse-to-fine retrieval.
+
+Chunks belong to a few thousand source documents. Each document gets one
+vector: the mean of its chunk embeddings blended with an embedding of its
+title (the first line of the page, e.g. "Moxifloxacin: MedlinePlus Drug
+Information"), re-normalized. A query first picks the top documents from
+this small index, then only those documents' chunks are scored exactly.
+
+    docs/
+      index.faiss   IndexFlatIP over one vector per document
+      rows.npy      chunk rows (FAISS row ids) grouped by document
+      offsets.npy   document d owns rows[offsets[d]:offsets[d + 1]]
+      docs.json     [{"source": ..., "title": ...}, ...]
+
+Written by embeddings/05_build_faiss_index.py next to the chunk index.
+Used by app/07_qa_faiss.py with QA_SEARCH=two_level.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+from index_versions import current_dir
+
+INDEX_DIR = current_dir()  # live index version (see index_versions.py)
+DOCS_DIR = os.path.join(INDEX_DIR, "docs")
+
+TITLE_WEIGHT = 0.3   # share of the title embedding in a document vector
+TOP_DOCS = 8         # documents whose chunks are scored per query
+
+# "Broken bone: MedlinePlus Medical Encyclopedia" -> "Broken bone"
+_SITE_SUFFIX_RE = re.compile(r"\s*[:|\-]\s*(MedlinePlus.*|CDC|World Health Organization.*|WHO)\s*$")
+
+
+def doc_title(first_chunk_text: str, source: str) -> str:
+    """Page title from the first line of a document's first chunk, else the file name."""
+    first_line = first_chunk_text.strip().split("\n", 1)[0].strip() if first_chunk_text else ""
+    title = _SITE_SUFFIX_RE.sub("", first_line)
+    if not title or len(title) > 200:
+        title = os.path.splitext(os.path.basename(source))[0].replace("_", " ")
+    return title
+
+
+def write_doc_index(out_dir: str, embeddings: np.ndarray, metadata: list[dict], texts: list[str],
+                    encode, title_weight: float = TITLE_WEIGHT):
+    """Build the document index from chunk embeddings; encode(list[str]) embeds titles."""
+    import faiss
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    doc_ids: dict[str, int] = {}
+    first_text: dict[str, tuple[int, str]] = {}
+    row_doc = np.empty(len(metadata), dtype="int64")
+    for row, (m, text) in enumerate(zip(metadata, texts)):
+        d = doc_ids.setdefault(m["source"], len(doc_ids))
+        row_doc[row] = d
+        best = first_text.get(m["source"])
+        if best is None or m["chunk_index"] < best[0]:
+            first_text[m["source"]] = (m["chunk_index"], text)
+
+    n_docs = len(doc_ids)
+    rows = np.argsort(row_doc, kind="stable").astype("int64")
+    counts = np.bincount(row_doc, minlength=n_docs)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype("int64")
+
+    # Mean-pooled chunk embeddings per document
+    sums = np.zeros((n_docs, embeddings.shape[1]), dtype="float32")
+    np.add.at(sums, row_doc, embeddings)
+    means = sums / counts[:, None]
+    means /= np.linalg.norm(means, axis=1, keepdims=True) + 1e-12
+
+    sources = list(doc_ids)
+    titles = [doc_title(first_text[s][1], s) for s in sources]
+    title_emb = np.asarray(encode(titles), dtype="float32")
+
+    doc_vecs = ((1 - title_weight) * means + title_weight * title_emb).astype("float32")
+    doc_vecs /= np.linalg.norm(doc_vecs, axis=1, keepdims=True) + 1e-12
+
+    index = faiss.IndexFlatIP(doc_vecs.shape[1])
+    index.add(doc_vecs)
+    faiss.write_index(index, os.path.join(out_dir, "index.faiss"))
+    np.save(os.path.join(out_dir, "rows.npy"), rows)
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets)
+    with open(os.path.join(out_dir, "docs.json"), "w", encoding="utf-8") as f:
+        json.dump([{"source": s, "title": t} for s, t in zip(sources, titles)], f, ensure_ascii=False)
+    print(f"[DOCS] Wrote document index: {n_docs} documents over {len(rows)} chunks → {out_dir}")
+
+
+def has_doc_index(docs_dir: str = DOCS_DIR) -> bool:
+    return all(
+        os.path.exists(os.path.join(docs_dir, name))
+        for name in ("index.faiss", "rows.npy", "offsets.npy", "docs.json")
+    )
+
+
+class TwoLevelIndex:
+    """
+    Coarse-to-fine search over a flat chunk index: top documents first,
+    then exact inner products over only their chunks. search(q, k) has
+    the same signature and output as a FAISS index.
+    """
+
+    def __init__(self, chunk_index, docs_dir: str = DOCS_DIR, top_docs: int = TOP_DOCS):
+        import faiss
+
+        self.chunk_index = chunk_index
+        self.doc_index = faiss.read_index(os.path.join(docs_dir, "index.faiss"))
+        self.rows = np.load(os.path.join(docs_dir, "rows.npy"))
+        self.offsets = np.load(os.path.join(docs_dir, "offsets.npy"))
+        self.top_docs = top_docs
+        self.ntotal = chunk_index.ntotal
+
+    def candidates(self, doc_ids) -> np.ndarray:
+        return np.concatenate([self.rows[self.offsets[d]:self.offsets[d + 1]] for d in doc_ids if d >= 0])
+
+    def search(self, q: np.ndarray, k: int):
+        q = np.ascontiguousarray(q, dtype="float32")
+        _, docs = self.doc_index.search(q, self.top_docs)
+
+        scores = np.full((len(q), k), -np.inf, dtype="float32")
+        ids = np.full((len(q), k), -1, dtype="int64")
+        for i, doc_ids in enumerate(docs):
+            rows = self.candidates(doc_ids)
+            if not len(rows):
+                continue
+            vecs = self.chunk_index.reconstruct_batch(rows)
+            s = vecs @ q[i]
+            top = np.argsort(-s, kind="stable")[:k]
+            scores[i, :len(top)] = s[top]
+            ids[i, :len(top)] = rows[top]
+        return scores, ids
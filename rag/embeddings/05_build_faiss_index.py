@@ -6,11 +6,30 @@ No API calls required.
 Input:
     rag/data_chunks/**/*.jsonl
 Output:
-    rag/vectorstore/medlineplus_faiss/
+    rag/vectorstore/medlineplus_faiss/versions/<version>/
+        index.faiss, metadata.jsonl, state/
+        docs/     (document-level index, see doc_index.py)
+        shards/   (with --shards N, see sharding.py)
+
+Each build is written to a staging directory and published as a new
+version only once complete (see index_versions.py), so a running QA
+process never sees a half-written index and can reload the new one
+without restarting.
+
+Embeddings are written in fixed-size checkpoint files under
+vectorstore/medlineplus_faiss/checkpoints/ with a progress manifest, so an
+interrupted build resumes where it stopped; the index is assembled from
+those files at the end. The manifest is tied to the model and the exact
+chunk contents, so changed chunks start a fresh build. --restart discards
+existing checkpoints.
 """
 
+import argparse
+import hashlib
 import os
+import shutil
 import json
+import sys
 from pathlib import Path
 from typing import List, Dict
 
@@ -19,15 +38,22 @@ import faiss
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import run_stage  # noqa: E402  (lives in rag/)
+from retrieval_state import write_compact_state  # noqa: E402
+from sharding import write_shards  # noqa: E402
+from doc_index import write_doc_index  # noqa: E402
+from index_versions import INDEX_ROOT, publish, stage_version  # noqa: E402
+from multilingual_index import LANG_DIR, available_languages  # noqa: E402
+
 # ----- paths -----
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
-INDEX_DIR = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
+CHECKPOINT_DIR = os.path.join(INDEX_ROOT, "checkpoints")
 
-INDEX_PATH = os.path.join(INDEX_DIR, "index.faiss")
-META_PATH = os.path.join(INDEX_DIR, "metadata.jsonl")
+CHECKPOINT_ROWS = 4096
 
-os.makedirs(INDEX_DIR, exist_ok=True)
+os.makedirs(INDEX_ROOT, exist_ok=True)
 
 # ----- SBERT model -----
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
@@ -45,7 +71,83 @@ def iter_chunk_records(chunks_dir: Path):
                     yield json.loads(line)
 
 
-def build_faiss_index():
+def corpus_fingerprint(metadata: List[Dict], texts: List[str]) -> str:
+    h = hashlib.sha1(MODEL_NAME.encode("utf-8"))
+    for m, text in zip(metadata, texts):
+        h.update(m["id"].encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def write_json_atomic(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_manifest(fingerprint: str, total: int) -> Dict:
+    """Resume a matching manifest, or start a fresh one (dropping stale checkpoints)."""
+    manifest_path = os.path.join(CHECKPOINT_DIR, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("fingerprint") == fingerprint and manifest.get("rows_per_file") == CHECKPOINT_ROWS:
+            return manifest
+        print("[INFO] Chunks or model changed since the last build, discarding checkpoints")
+        shutil.rmtree(CHECKPOINT_DIR)
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    manifest = {
+        "model": MODEL_NAME,
+        "fingerprint": fingerprint,
+        "total": total,
+        "rows_per_file": CHECKPOINT_ROWS,
+        "completed": [],
+    }
+    write_json_atomic(manifest_path, manifest)
+    return manifest
+
+
+def embed_with_checkpoints(texts: List[str], metadata: List[Dict]) -> np.ndarray:
+    total = len(texts)
+    manifest = load_manifest(corpus_fingerprint(metadata, texts), total)
+    manifest_path = os.path.join(CHECKPOINT_DIR, "manifest.json")
+    completed = set(manifest["completed"])
+
+    n_files = (total + CHECKPOINT_ROWS - 1) // CHECKPOINT_ROWS
+    if completed:
+        print(f"[INFO] Resuming: {len(completed)}/{n_files} embedding files already done")
+
+    for i in tqdm(range(n_files), desc="Embedding files"):
+        if i in completed:
+            continue
+        start = i * CHECKPOINT_ROWS
+        emb = model.encode(
+            texts[start:start + CHECKPOINT_ROWS],
+            convert_to_numpy=True,
+            batch_size=32,
+            normalize_embeddings=True
+        ).astype("float32")
+
+        # Write the file first, then record it, so a crash never marks a partial file done
+        path = os.path.join(CHECKPOINT_DIR, f"emb_{i:05d}.npy")
+        np.save(path + ".tmp.npy", emb)
+        os.replace(path + ".tmp.npy", path)
+        completed.add(i)
+        manifest["completed"] = sorted(completed)
+        write_json_atomic(manifest_path, manifest)
+
+    return np.concatenate([
+        np.load(os.path.join(CHECKPOINT_DIR, f"emb_{i:05d}.npy"), mmap_mode="r")
+        for i in range(n_files)
+    ])
+
+
+def build_faiss_index(out_dir: str, n_shards: int = 0, restart: bool = False) -> Dict:
+    """Build every index file into out_dir; returns the version manifest."""
     records = list(iter_chunk_records(Path(CHUNKS_DIR)))
     total = len(records)
     print(f"[INFO] Total chunks: {total}")
@@ -60,15 +162,11 @@ def build_faiss_index():
         for rec in records
     ]
 
-    # ---- embed with SBERT ----
+    # ---- embed with SBERT (checkpointed) ----
     print("[INFO] Computing SBERT embeddings...")
-    embeddings = model.encode(
-        texts,
-        convert_to_numpy=True,
-        batch_size=32,
-        show_progress_bar=True,
-        normalize_embeddings=True
-    )
+    if restart and os.path.isdir(CHECKPOINT_DIR):
+        shutil.rmtree(CHECKPOINT_DIR)
+    embeddings = embed_with_checkpoints(texts, metadata)
 
     dim = embeddings.shape[1]
     print(f"[INFO] Embedding dim = {dim}")
@@ -77,19 +175,58 @@ def build_faiss_index():
     index = faiss.IndexFlatIP(dim)
     index.add(embeddings)
 
-    faiss.write_index(index, INDEX_PATH)
-    print(f"[INFO] Saved FAISS index → {INDEX_PATH}")
+    index_path = os.path.join(out_dir, "index.faiss")
+    faiss.write_index(index, index_path)
+    print(f"[INFO] Saved FAISS index → {index_path}")
 
-    with open(META_PATH, "w", encoding="utf-8") as f:
+    meta_path = os.path.join(out_dir, "metadata.jsonl")
+    with open(meta_path, "w", encoding="utf-8") as f:
         for m in metadata:
             f.write(json.dumps(m, ensure_ascii=False) + "\n")
 
-    print(f"[INFO] Saved metadata → {META_PATH}")
+    print(f"[INFO] Saved metadata → {meta_path}")
+
+    # Memory-mapped chunk store shared by QA workers (see retrieval_state.py)
+    write_compact_state(os.path.join(out_dir, "state"), metadata, texts)
+
+    # Document centroids for coarse-to-fine search (see doc_index.py)
+    write_doc_index(
+        os.path.join(out_dir, "docs"), embeddings, metadata, texts,
+        lambda titles: model.encode(titles, convert_to_numpy=True, batch_size=64, normalize_embeddings=True),
+    )
+
+    # Optional partitioning for scatter-gather serving; row ids stay global
+    if n_shards > 1:
+        write_shards(embeddings, metadata, n_shards, os.path.join(out_dir, "shards"))
+    return {"rows": total, "dim": int(dim), "model": MODEL_NAME, "shards": n_shards if n_shards > 1 else 0}
 
 
 def main():
-    build_faiss_index()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, default=0,
+                        help="also partition the vectors into N shards for sharding.py workers")
+    parser.add_argument("--restart", action="store_true",
+                        help="discard embedding checkpoints and embed everything again")
+    args, _ = parser.parse_known_args()
+
+    version, staging = stage_version()
+    try:
+        manifest = build_faiss_index(staging, n_shards=args.shards, restart=args.restart)
+    except BaseException:
+        # Embedding checkpoints survive; only the half-written version goes
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    final = publish(version, staging, manifest)
+    print(f"[INFO] Published index version {version} → {final}")
+
+    # Partitions are per version (rows must line up with the new chunks)
+    previous_langs = available_languages(LANG_DIR)
+    if previous_langs:
+        langs = ",".join(previous_langs)
+        print(f"[INFO] The previous version had language partitions ({langs}); until you run "
+              f"embeddings/build_multilingual_index.py --langs {langs}, those languages use online translation")
+    return manifest["rows"]
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("05_index", main, unit="embeddings")
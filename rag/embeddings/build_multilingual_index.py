@@ -0,0 +1,236 @@
+# build_multilingual_index.py
+"""
+Offline job: translate the chunk corpus into the configured languages and
+build one language-tagged index partition per language (see
+multilingual_index.py).
+
+Translation reuses translation-api's M2M100 backend (TRANSLATION_BACKEND
+torch|ct2), sentence segmenter and length buckets, so the output matches
+what the online service would produce. Work is checkpointed per block of
+chunks under vectorstore/medlineplus_faiss/lang_checkpoints/<lang>/; an
+interrupted run resumes at the first unfinished block, and a later run
+over the same chunks (e.g. after a 05 build that changed nothing) reuses
+the translations. Changed chunks start over.
+
+The live version is never modified: the partitions go into a new version
+derived from it (same files, hardlinked, plus lang/), published like a
+05 build, so a running QA process picks them up by hot reload.
+
+Input:
+    current index version: metadata.jsonl (+ state/ or data_chunks/)
+Output:
+    new index version: lang/<lang>/   (see index_versions.py)
+
+Run from project root (rag/) after 05_build_faiss_index.py:
+    (venv) python embeddings/build_multilingual_index.py --langs hi,ta
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import faiss
+from tqdm import tqdm
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from profiling import run_stage  # noqa: E402  (lives in rag/)
+from retrieval_state import (  # noqa: E402
+    CHUNKS_DIR,
+    META_PATH,
+    STATE_DIR,
+    CompactChunkStore,
+    has_compact_state,
+    load_chunk_texts,
+    load_metadata,
+    write_compact_state,
+)
+from multilingual_index import INDEX_DIR, LANG_ENCODER, available_languages, encode_passages, partition_dir  # noqa: E402
+from index_versions import INDEX_ROOT, LEGACY_VERSION, derive_version, publish, read_manifest  # noqa: E402
+
+# translation-api lives next to rag/
+TRANSLATION_API_DIR = os.path.join(os.path.dirname(BASE_DIR), "translation-api")
+sys.path.insert(0, TRANSLATION_API_DIR)
+from backends import MODEL_NAME as TRANSLATION_MODEL, load_backend  # noqa: E402
+from batcher import length_buckets  # noqa: E402
+from segmenter import join_segments, split_segments  # noqa: E402
+
+DEFAULT_LANGS = os.environ.get("INDEX_LANGS", "hi,ta")
+BLOCK_CHUNKS = 256   # chunks per checkpoint file
+TIER = "fast"        # greedy decoding; the whole corpus is a lot of sentences
+
+# Outside versions/ and 05's checkpoints/ (which a changed build wipes)
+CHECKPOINT_DIR = os.path.join(INDEX_ROOT, "lang_checkpoints")
+
+
+def load_corpus() -> tuple[list[dict], list[str]]:
+    """English chunk metadata and texts, in index row order."""
+    metadata = load_metadata(META_PATH)
+    if has_compact_state(STATE_DIR):
+        store = CompactChunkStore(STATE_DIR)
+        texts = [store.text(row) for row in range(len(metadata))]
+    else:
+        chunk_text_map = load_chunk_texts(CHUNKS_DIR)
+        texts = [chunk_text_map.get(m["id"], "") for m in metadata]
+    return metadata, texts
+
+
+def fingerprint(metadata: list[dict], texts: list[str], lang: str) -> str:
+    h = hashlib.sha1(f"{TRANSLATION_MODEL}|{lang}|{BLOCK_CHUNKS}".encode("utf-8"))
+    for m, text in zip(metadata, texts):
+        h.update(m["id"].encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def translate_chunks(backend, texts: list[str], src: str, tgt: str) -> list[str]:
+    """Translate whole chunks sentence by sentence, in length-bucketed batches."""
+    chunk_segments = [split_segments(t) for t in texts]
+    unique = list(dict.fromkeys(seg for segments in chunk_segments for seg, _ in segments))
+
+    translated: dict[str, str] = {}
+    for bucket in length_buckets(unique):
+        batch = [unique[i] for i in bucket]
+        translated.update(zip(batch, backend.translate(batch, src, tgt, TIER)))
+
+    return [
+        join_segments([translated[seg] for seg, _ in segments], [sep for _, sep in segments])
+        for segments in chunk_segments
+    ]
+
+
+def write_json_atomic(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def translate_language(lang: str, metadata: list[dict], texts: list[str], get_backend, restart: bool) -> list[str]:
+    ckpt_dir = os.path.join(CHECKPOINT_DIR, lang)
+    progress_path = os.path.join(ckpt_dir, "progress.json")
+    fp = fingerprint(metadata, texts, lang)
+
+    if restart and os.path.isdir(ckpt_dir):
+        shutil.rmtree(ckpt_dir)
+    progress = None
+    if os.path.exists(progress_path):
+        with open(progress_path, "r", encoding="utf-8") as f:
+            progress = json.load(f)
+        if progress.get("fingerprint") != fp:
+            print(f"[LANG:{lang}] Chunks changed since the last run, discarding translations")
+            shutil.rmtree(ckpt_dir)
+            progress = None
+    if progress is None:
+        os.makedirs(ckpt_dir, exist_ok=True)
+        progress = {"fingerprint": fp, "lang": lang, "completed": []}
+        write_json_atomic(progress_path, progress)
+
+    completed = set(progress["completed"])
+    n_blocks = (len(texts) + BLOCK_CHUNKS - 1) // BLOCK_CHUNKS
+    if completed:
+        print(f"[LANG:{lang}] Resuming: {len(completed)}/{n_blocks} blocks already translated")
+
+    for b in tqdm(range(n_blocks), desc=f"Translating en→{lang}"):
+        if b in completed:
+            continue
+        start = b * BLOCK_CHUNKS
+        block = translate_chunks(get_backend(), texts[start:start + BLOCK_CHUNKS], "en", lang)
+
+        path = os.path.join(ckpt_dir, f"part_{b:05d}.jsonl")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for text in block:
+                f.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
+        os.replace(path + ".tmp", path)
+        completed.add(b)
+        progress["completed"] = sorted(completed)
+        write_json_atomic(progress_path, progress)
+
+    translated = []
+    for b in range(n_blocks):
+        with open(os.path.join(ckpt_dir, f"part_{b:05d}.jsonl"), "r", encoding="utf-8") as f:
+            translated.extend(json.loads(line)["text"] for line in f if line.strip())
+    return translated
+
+
+def build_partition(lang: str, metadata: list[dict], translated: list[str], encoder, lang_dir: str):
+    root = partition_dir(lang, lang_dir)
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, "manifest.json")
+
+    start = time.perf_counter()
+    embeddings = encode_passages(encoder, translated)
+    encode_s = time.perf_counter() - start
+
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(embeddings)
+    faiss.write_index(index, os.path.join(root, "index.faiss"))
+    write_compact_state(os.path.join(root, "state"), metadata, translated)
+
+    write_json_atomic(manifest_path, {
+        "lang": lang,
+        "rows": len(translated),
+        "dim": int(embeddings.shape[1]),
+        "encoder": LANG_ENCODER,
+        "translated_with": TRANSLATION_MODEL,
+        "encode_seconds": round(encode_s, 1),
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    print(f"[LANG:{lang}] Partition ready: {len(translated)} chunks → {root}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--langs", default=DEFAULT_LANGS, help="comma-separated M2M100 language codes")
+    parser.add_argument("--restart", action="store_true", help="discard translation checkpoints")
+    args, _ = parser.parse_known_args()
+    langs = [l.strip() for l in args.langs.split(",") if l.strip()]
+
+    # INDEX_DIR is the version the corpus is read from (resolved once, at import)
+    metadata, texts = load_corpus()
+    base = LEGACY_VERSION if os.path.samefile(INDEX_DIR, INDEX_ROOT) else os.path.basename(INDEX_DIR)
+    print(f"[INFO] {len(metadata)} chunks from index version {base}, languages: {', '.join(langs)}")
+
+    # Only load M2M100 if some block still needs translating
+    backend = None
+
+    def get_backend():
+        nonlocal backend
+        if backend is None:
+            backend = load_backend()
+            print(f"[INFO] Translation backend: {backend.name}")
+        return backend
+
+    from sentence_transformers import SentenceTransformer
+    encoder = SentenceTransformer(LANG_ENCODER)
+
+    # Translate first (the slow, resumable part), then stage the new version
+    translations = {
+        lang: translate_language(lang, metadata, texts, get_backend, args.restart) for lang in langs
+    }
+
+    # Other languages already in the base version carry over; these are rebuilt
+    version, staging = derive_version(INDEX_DIR, exclude=[os.path.join("lang", lang) for lang in langs])
+    lang_dir = os.path.join(staging, "lang")
+    try:
+        for lang in langs:
+            build_partition(lang, metadata, translations[lang], encoder, lang_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    manifest = {k: v for k, v in read_manifest(INDEX_DIR).items() if k not in ("version", "published")}
+    manifest.update(base=base, langs=available_languages(lang_dir))
+    final = publish(version, staging, manifest)
+    print(f"[INFO] Published index version {version} (base {base} + lang/) → {final}")
+    return len(metadata) * len(langs)
+
+
+if __name__ == "__main__":
+    run_stage("05_multilingual", main, unit="chunk translations")
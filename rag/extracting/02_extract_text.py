@@ -1,17 +1,37 @@
 # 02_extract_text.py
+"""
+Extract text from the scraped pages in data_raw/ into data_text/.
+
+HTML: main content only, via lxml and per-site selectors (see
+html_content.py). HTML_EXTRACTOR=bs4 restores the old whole-page
+BeautifulSoup extraction, e.g. to compare outputs.
+PDF: pdfplumber, page by page.
+"""
+
 import os
+import sys
+from collections import Counter
 from pathlib import Path
 
 import pdfplumber
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import run_stage  # noqa: E402  (lives in rag/)
+from html_content import extract_text  # noqa: E402
+
 # This file is in rag/extracting/, so go up one level to rag/
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 RAW_DIR = os.path.join(BASE_DIR, "data_raw")
 TEXT_DIR = os.path.join(BASE_DIR, "data_text")
 
+HTML_EXTRACTOR = os.environ.get("HTML_EXTRACTOR", "lxml")  # lxml | bs4
+
+# How each HTML page was extracted (site / main / density / body), printed at the end
+html_methods = Counter()
+
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -21,6 +41,19 @@ def extract_html_to_txt(in_path: Path, out_path: Path):
     with open(in_path, "r", encoding="utf-8", errors="ignore") as f:
         html = f.read()
 
+    if HTML_EXTRACTOR == "bs4":
+        text = extract_html_bs4(html)
+        html_methods["bs4"] += 1
+    else:
+        text, method = extract_text(html, in_path.name)
+        html_methods[method] += 1
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def extract_html_bs4(html: str) -> str:
     soup = BeautifulSoup(html, "html.parser")
 
     # Remove unnecessary tags
@@ -29,11 +62,7 @@ def extract_html_to_txt(in_path: Path, out_path: Path):
 
     # Extract clean text
     text = soup.get_text(separator="\n")
-    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
-
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(text)
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
 
 
 def extract_pdf_to_txt(in_path: Path, out_path: Path):
@@ -54,6 +83,7 @@ def extract_pdf_to_txt(in_path: Path, out_path: Path):
 
 def main():
     ensure_dir(TEXT_DIR)
+    processed = 0
 
     for root, _, files in os.walk(RAW_DIR):
         for fname in tqdm(files, desc=f"Extracting in {root}"):
@@ -71,12 +101,18 @@ def main():
 
             if lower.endswith(".html") or lower.endswith(".htm"):
                 extract_html_to_txt(in_path, out_path)
+                processed += 1
 
             elif lower.endswith(".pdf"):
                 extract_pdf_to_txt(in_path, out_path)
+                processed += 1
 
             # Everything else is ignored
 
+    if html_methods:
+        print(f"[EXTRACT] HTML pages by method: {dict(html_methods)}")
+    return processed
+
 
 if __name__ == "__main__":
-    main()
+    run_stage("02_extract", main, unit="documents")
@@ -0,0 +1,170 @@
+# html_content.py
+"""
+Main-content extraction for scraped HTML pages, on lxml (libxml2).
+
+Each page is parsed once. Page chrome (script/style, nav, header, footer,
+forms, ...) is dropped, and only the main content region is turned into
+text:
+
+    1. per-site XPath selectors (SITE_RULES, matched on the file name,
+       which starts with the host, see 01_download_scrape.safe_filename):
+       MedlinePlus drug and encyclopedia articles, WHO fact sheets and
+       health topics, CDC pages
+    2. otherwise <main> / role="main" / <article>
+    3. otherwise the densest block: the element whose paragraphs carry
+       the most non-link text (a small Readability-style score)
+    4. otherwise the whole <body>
+
+Output is one line per block element, starting with the page <title>
+(doc_index.py uses the first line as the document title).
+
+Used by:
+    extracting/02_extract_text.py
+"""
+
+import lxml.html
+from lxml import etree
+
+PARSER = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+
+# Never content, on any site
+DROP = etree.XPath(
+    "//script | //style | //noscript | //template | //nav | //header | //footer"
+    " | //form | //button | //select | //iframe | //svg | //aside"
+)
+
+# (file name prefix, content XPaths in order of preference, junk inside the content)
+SITE_RULES = [
+    (
+        "medlineplus.gov_",
+        ["//div[@id='mplus-content']//article"],
+        # table of contents, "Learn how to cite this page", image thumbnails
+        [".//*[@id='toc-box']", ".//*[@id='citation-how-to']", ".//*[@id='section-tnails']"],
+    ),
+    (
+        "www.who.int_",
+        ["//article[contains(concat(' ', normalize-space(@class), ' '), ' sf-detail-body-wrapper ')]"],
+        [],
+    ),
+    (
+        "www.cdc.gov_",
+        [
+            "//div[contains(concat(' ', normalize-space(@class), ' '), ' cdc-dfe-body ')]",
+            "//div[contains(concat(' ', normalize-space(@class), ' '), ' syndicate ')]",
+            "//main",
+        ],
+        [],
+    ),
+]
+_SITE_RULES = [
+    (prefix, [etree.XPath(x) for x in content], [etree.XPath(x) for x in junk])
+    for prefix, content, junk in SITE_RULES
+]
+_GENERIC = etree.XPath("//main | //*[@role='main'] | //article")
+
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "br", "caption", "dd", "details", "div", "dl", "dt",
+    "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol",
+    "p", "pre", "section", "summary", "table", "tbody", "thead", "tr", "ul",
+}
+CELL_TAGS = {"td", "th"}
+PARAGRAPH_TAGS = ("p", "pre", "li", "dd", "td", "blockquote")
+
+MIN_PARAGRAPH_CHARS = 25   # shorter "paragraphs" (buttons, labels) don't vote
+MIN_CONTENT_CHARS = 200    # a region with less text than this is not the content
+
+
+def _text_len(el) -> int:
+    return len(" ".join(el.text_content().split()))
+
+
+def block_lines(root) -> list[str]:
+    """Text of root, one line per block element, whitespace collapsed."""
+    lines, buf = [], []
+
+    def flush():
+        line = " ".join("".join(buf).split())
+        if line:
+            lines.append(line)
+        buf.clear()
+
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        tag = el.tag if isinstance(el.tag, str) else None
+        if event == "start":
+            if tag in BLOCK_TAGS:
+                flush()
+            if tag and el.text:
+                buf.append(el.text)
+        else:
+            if tag in BLOCK_TAGS:
+                flush()
+            elif tag in CELL_TAGS:
+                buf.append(" ")
+            if el is not root and el.tail:
+                buf.append(el.tail)
+    flush()
+    return lines
+
+
+def densest_block(body):
+    """Element whose paragraphs hold the most non-link text (parents full, grandparents half)."""
+    scores: dict = {}
+    for p in body.iter(*PARAGRAPH_TAGS):
+        text_len = _text_len(p)
+        if text_len < MIN_PARAGRAPH_CHARS:
+            continue
+        score = text_len - sum(_text_len(a) for a in p.iter("a"))
+        parent = p.getparent()
+        if parent is None or score <= 0:
+            continue
+        scores[parent] = scores.get(parent, 0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + score / 2
+    if not scores:
+        return None
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= MIN_CONTENT_CHARS else None
+
+
+def _site_content(doc, filename: str):
+    for prefix, content, junk in _SITE_RULES:
+        if not filename.startswith(prefix):
+            continue
+        for xpath in content:
+            found = xpath(doc)
+            if found:
+                region = max(found, key=_text_len)
+                for junk_xpath in junk:
+                    for el in junk_xpath(region):
+                        el.drop_tree()
+                return region
+    return None
+
+
+def extract_text(html: str, filename: str = "") -> tuple[str, str]:
+    """Main text of a page; returns (text, method), method being site/main/density/body."""
+    try:
+        doc = lxml.html.document_fromstring(html, parser=PARSER)
+    except (etree.ParserError, ValueError):
+        return "", "empty"
+
+    title = " ".join((doc.findtext(".//title") or "").split())
+    for el in DROP(doc):
+        el.drop_tree()
+
+    region, method = _site_content(doc, filename), "site"
+    if region is None or _text_len(region) < MIN_CONTENT_CHARS:
+        candidates = [el for el in _GENERIC(doc) if _text_len(el) >= MIN_CONTENT_CHARS]
+        region, method = (max(candidates, key=_text_len), "main") if candidates else (None, None)
+    if region is None:
+        body = doc.find("body")
+        body = body if body is not None else doc
+        region, method = densest_block(body), "density"
+        if region is None:
+            region, method = body, "body"
+
+    lines = block_lines(region)
+    if title and (not lines or lines[0] != title):
+        lines.insert(0, title)
+    return "\n".join(lines), method
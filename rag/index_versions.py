@@ -0,0 +1,169 @@
+# index_versions.py
+"""
+Versioned index directories with an atomic "current" pointer.
+
+05_build_faiss_index.py never writes into the directory the QA process is
+reading. Each build goes to a staging directory and is published as a
+new version:
+
+    vectorstore/medlineplus_faiss/
+      CURRENT                   name of the live version (one line)
+      versions/<version>/
+        manifest.json           written last: rows, dim, model, files
+        index.faiss, metadata.jsonl, state/, docs/, shards/, lang/
+      checkpoints/              embedding checkpoints (shared across builds)
+      lang_checkpoints/         translation checkpoints (build_multilingual_index.py)
+
+build_multilingual_index.py adds language partitions the same way: it
+derives a new version from the live one (derive_version: same files,
+hardlinked) with lang/ added, and publishes that.
+
+Publishing is a directory rename followed by an os.replace() of CURRENT,
+so a reader sees either the old version or the new one, never a mix of a
+new index with old metadata. Without a CURRENT file (an index built
+before versioning) the flat layout directly under medlineplus_faiss/ is
+the current version.
+
+The QA process picks up a new version without restarting (see
+app/index_reload.py).
+
+Used by:
+    embeddings/05_build_faiss_index.py, embeddings/build_multilingual_index.py
+    retrieval_state.py, doc_index.py, sharding.py, multilingual_index.py
+    06_export_node_embeddings.py, app/07_qa_faiss.py
+"""
+
+import json
+import os
+import shutil
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_ROOT = os.path.join(BASE_DIR, "vectorstore", "medlineplus_faiss")
+VERSIONS_DIR = os.path.join(INDEX_ROOT, "versions")
+POINTER_PATH = os.path.join(INDEX_ROOT, "CURRENT")
+
+# Index root bookkeeping; only part of a version in the legacy flat layout,
+# where the root is the version directory
+_ROOT_ENTRIES = {"CURRENT", "CURRENT.tmp", "versions", "checkpoints", "lang_checkpoints"}
+
+KEEP_VERSIONS = int(os.environ.get("INDEX_KEEP_VERSIONS", "3"))  # published versions kept on disk
+LEGACY_VERSION = "legacy"
+
+
+def current_version(index_root: str = INDEX_ROOT) -> str | None:
+    """Name of the live version, or None for the unversioned flat layout."""
+    try:
+        with open(os.path.join(index_root, "CURRENT"), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(version: str | None, index_root: str = INDEX_ROOT) -> str:
+    if version is None or version == LEGACY_VERSION:
+        return index_root
+    return os.path.join(index_root, "versions", version)
+
+
+def current_dir(index_root: str = INDEX_ROOT) -> str:
+    return version_dir(current_version(index_root), index_root)
+
+
+def read_manifest(path: str) -> dict:
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stage_version(index_root: str = INDEX_ROOT) -> tuple[str, str]:
+    """Create an empty staging directory for a build; returns (version, staging_dir)."""
+    version = time.strftime("%Y%m%d-%H%M%S")
+    versions_dir = os.path.join(index_root, "versions")
+    # Two builds in the same second get distinct names
+    n = 1
+    while os.path.exists(os.path.join(versions_dir, version)):
+        n += 1
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{n}"
+    staging = os.path.join(versions_dir, f".{version}.partial")
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    return version, staging
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:  # other filesystem, or no hardlink support
+        shutil.copy2(src, dst)
+
+
+def derive_version(base_dir: str, exclude=(), index_root: str = INDEX_ROOT) -> tuple[str, str]:
+    """
+    Stage a new version holding the files of base_dir (except the paths in
+    `exclude`, relative to base_dir) and return (version, staging_dir).
+    Files are hardlinked, so a copied file must be replaced, never
+    rewritten in place: that would change base_dir's copy too.
+    """
+    version, staging = stage_version(index_root)
+    os.rmdir(staging)  # copytree creates it
+    base_dir = os.path.abspath(base_dir)
+    skip = {os.path.normpath(p) for p in exclude} | {"manifest.json"}  # publish() writes a new one
+    if base_dir == os.path.abspath(index_root):
+        skip |= _ROOT_ENTRIES
+
+    def ignore(d, names):
+        rel = os.path.relpath(d, base_dir)
+        return [n for n in names if os.path.normpath(os.path.join(rel, n)) in skip]
+
+    shutil.copytree(base_dir, staging, ignore=ignore, copy_function=_link_or_copy)
+    return version, staging
+
+
+def publish(version: str, staging: str, manifest: dict, index_root: str = INDEX_ROOT) -> str:
+    """Finish a staged build and make it the current version."""
+    manifest = {"version": version, "published": time.strftime("%Y-%m-%dT%H:%M:%S"), **manifest}
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    final = version_dir(version, index_root)
+    os.rename(staging, final)
+
+    pointer = os.path.join(index_root, "CURRENT")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + ".tmp", pointer)
+
+    prune(index_root=index_root)
+    return final
+
+
+def list_versions(index_root: str = INDEX_ROOT) -> list[str]:
+    """Published versions, oldest first (names sort by build time)."""
+    versions_dir = os.path.join(index_root, "versions")
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        d for d in os.listdir(versions_dir)
+        if not d.startswith(".") and os.path.exists(os.path.join(versions_dir, d, "manifest.json"))
+    )
+
+
+def prune(keep: int = KEEP_VERSIONS, index_root: str = INDEX_ROOT):
+    """
+    Delete all but the newest `keep` versions (never the current one).
+    A QA process still serving a deleted version keeps working: its
+    memory-mapped files stay valid until it lets go of them.
+    """
+    current = current_version(index_root)
+    versions = list_versions(index_root)
+    for v in versions[:max(0, len(versions) - max(1, keep))]:
+        if v == current:
+            continue
+        shutil.rmtree(version_dir(v, index_root), ignore_errors=True)
+        print(f"[VERSIONS] Removed old index version {v}")
@@ -0,0 +1,87 @@
+# multilingual_index.py
+"""
+Language-tagged partitions of the chunk index, pre-translated offline.
+
+For each configured language, embeddings/build_multilingual_index.py
+translates every chunk with the translation-api M2M100 model and writes:
+
+    <index version>/lang/<lang>/    (see index_versions.py)
+      manifest.json   {"lang", "rows", "encoder", "translated_with", ...}
+      index.faiss     IndexFlatIP over the translated chunks (LANG_ENCODER)
+      state/          compact chunk store of the translated texts (see
+                      retrieval_state.py)
+
+Rows line up with the English index and metadata.jsonl, so sources and
+chunk ids are unchanged. A question in a partitioned language is embedded
+with the same multilingual encoder and answered from that partition
+directly, without translating the question or the answer online.
+The builder publishes the partitions as a new index version (the version
+they were translated from plus lang/), which the QA process hot-reloads.
+A 05 build publishes a version without partitions, so run the builder
+again after it; unchanged chunks reuse their translations.
+
+Used by:
+    embeddings/build_multilingual_index.py
+    app/07_qa_faiss.py
+"""
+
+import json
+import os
+
+from index_versions import current_dir
+
+INDEX_DIR = current_dir()  # live index version (see index_versions.py)
+LANG_DIR = os.path.join(INDEX_DIR, "lang")
+
+# all-MiniLM-L6-v2 is English-only; multilingual-e5-small covers hi/ta/te/kn
+# at the same 384 dimensions. e5 models expect these input prefixes.
+LANG_ENCODER = os.environ.get("LANG_ENCODER", "intfloat/multilingual-e5-small")
+QUERY_PREFIX = "query: "
+PASSAGE_PREFIX = "passage: "
+
+LANGUAGE_NAMES = {"hi": "Hindi", "ta": "Tamil", "te": "Telugu", "kn": "Kannada"}
+
+
+def partition_dir(lang: str, lang_dir: str = LANG_DIR) -> str:
+    return os.path.join(lang_dir, lang)
+
+
+def available_languages(lang_dir: str = LANG_DIR) -> list[str]:
+    """Languages with a finished partition (manifest written last by the builder)."""
+    if not os.path.isdir(lang_dir):
+        return []
+    return sorted(
+        d for d in os.listdir(lang_dir)
+        if os.path.exists(os.path.join(lang_dir, d, "manifest.json"))
+    )
+
+
+def encode_passages(model, texts: list[str], batch_size: int = 64):
+    return model.encode(
+        [PASSAGE_PREFIX + t for t in texts], batch_size=batch_size,
+        convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=len(texts) > batch_size,
+    ).astype("float32")
+
+
+def encode_queries(model, texts: list[str]):
+    return model.encode(
+        [QUERY_PREFIX + t for t in texts], convert_to_numpy=True, normalize_embeddings=True,
+    ).astype("float32")
+
+
+class LanguagePartition:
+    """Index + translated chunk store for one language."""
+
+    def __init__(self, lang: str, lang_dir: str = LANG_DIR):
+        import faiss
+        from retrieval_state import CompactChunkStore
+
+        root = partition_dir(lang, lang_dir)
+        with open(os.path.join(root, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.lang = lang
+        try:
+            self.index = faiss.read_index(os.path.join(root, "index.faiss"), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            self.index = faiss.read_index(os.path.join(root, "index.faiss"))
+        self.store = CompactChunkStore(os.path.join(root, "state"))
@@ -0,0 +1,195 @@
+# profiling.py
+"""
+Common --profile mode for the numbered pipeline scripts (02-06).
+
+Each script ends with:
+
+    if __name__ == "__main__":
+        run_stage("04_chunk", main, unit="chunks")
+
+and main() returns the number of items it processed. Without flags this
+just calls main(). With --profile it also:
+
+  - runs the stage under cProfile (or pyinstrument with --profiler sampling)
+  - tracks peak RSS, and tracemalloc peak with --trace-malloc
+  - writes a run report to profiles/<stage>-<timestamp>.json:
+      wall time, items processed, throughput, top hot functions, peak memory
+      (top_functions has the same rows for both profilers; sampled ones
+      have no call counts)
+    plus the raw profile (.prof for cProfile, .html for pyinstrument)
+
+Run from project root (rag/):
+    (venv) python chunking/04_chunk_texts.py --profile
+    (venv) python embeddings/05_build_faiss_index.py --profile --profiler sampling
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+
+TOP_N = 25
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def parse_profile_args(argv=None):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", action="store_true", help="profile this stage and write a run report")
+    parser.add_argument("--profiler", choices=["cprofile", "sampling"], default="cprofile",
+                        help="cprofile (deterministic) or sampling (pyinstrument, lower overhead)")
+    parser.add_argument("--trace-malloc", action="store_true",
+                        help="also track Python heap peak with tracemalloc (slower)")
+    parser.add_argument("--report-dir", default=PROFILE_DIR)
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def top_functions(profiler: cProfile.Profile, n: int = TOP_N) -> list[dict]:
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": func,
+            "file": os.path.relpath(filename, BASE_DIR) if filename.startswith(BASE_DIR) else filename,
+            "line": line,
+            "ncalls": nc,
+            "tottime_s": round(tt, 4),
+            "cumtime_s": round(ct, 4),
+        })
+    rows.sort(key=lambda r: r["tottime_s"], reverse=True)
+    return rows[:n]
+
+
+def top_sampled_functions(session, n: int = TOP_N) -> list[dict]:
+    """
+    Same rows as top_functions(), aggregated from a pyinstrument session's
+    call tree. Times are sampled estimates and ncalls is unknown (None).
+    """
+    rows: dict[tuple, dict] = {}
+
+    def visit(frame, open_keys: frozenset):
+        if frame.is_synthetic:  # "[self]" / "[await]" leaves, already in total_self_time
+            return
+        filename = frame.file_path or ""
+        key = (filename, frame.line_no, frame.function)
+        row = rows.setdefault(key, {
+            "function": frame.function,
+            "file": os.path.relpath(filename, BASE_DIR) if filename.startswith(BASE_DIR) else filename,
+            "line": frame.line_no,
+            "ncalls": None,
+            "tottime_s": 0.0,
+            "cumtime_s": 0.0,
+        })
+        row["tottime_s"] += frame.total_self_time
+        if key not in open_keys:  # recursive calls count once towards cumulative time
+            row["cumtime_s"] += frame.time
+        for child in frame.children:
+            visit(child, open_keys | {key})
+
+    root = session.root_frame() if session is not None else None
+    if root is not None:
+        visit(root, frozenset())
+    for row in rows.values():
+        row["tottime_s"] = round(row["tottime_s"], 4)
+        row["cumtime_s"] = round(row["cumtime_s"], 4)
+    return sorted(rows.values(), key=lambda r: r["tottime_s"], reverse=True)[:n]
+
+
+def run_stage(stage: str, main, unit: str = "items", argv=None):
+    """Run a pipeline stage's main(), profiling it when --profile is given."""
+    args = parse_profile_args(argv)
+    if not args.profile:
+        return main()
+
+    os.makedirs(args.report_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(args.report_dir, f"{stage}-{stamp}")
+
+    if args.trace_malloc:
+        tracemalloc.start()
+
+    profiler = None
+    sampler = None
+    if args.profiler == "sampling":
+        try:
+            from pyinstrument import Profiler
+            sampler = Profiler()
+        except ImportError:
+            print("[PROFILE] pyinstrument not installed, falling back to cProfile")
+    if sampler is None:
+        profiler = cProfile.Profile()
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    if sampler:
+        sampler.start()
+    else:
+        profiler.enable()
+    try:
+        items = main()
+    finally:
+        if sampler:
+            sampler.stop()
+        else:
+            profiler.disable()
+        wall = time.perf_counter() - start
+
+    report = {
+        "stage": stage,
+        "started": stamp,
+        "argv": sys.argv[1:],
+        "wall_s": round(wall, 3),
+        "items": items,
+        "unit": unit,
+        "items_per_s": round(items / wall, 2) if isinstance(items, (int, float)) and wall else None,
+        "peak_rss_mb_before": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "profiler": "sampling" if sampler else "cprofile",
+    }
+
+    if args.trace_malloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["tracemalloc_peak_mb"] = round(peak / (1024 * 1024), 1)
+
+    if sampler:
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(sampler.output_html())
+        report["profile_file"] = base + ".html"
+        report["top_functions"] = top_sampled_functions(sampler.last_session)
+    else:
+        profiler.dump_stats(base + ".prof")
+        report["profile_file"] = base + ".prof"
+        report["top_functions"] = top_functions(profiler)
+
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[PROFILE] {stage}: {items} {unit} in {wall:.2f}s "
+          f"({report['items_per_s']} {unit}/s), peak RSS {report['peak_rss_mb']} MB")
+    print(f"[PROFILE] Report → {base}.json")
+    return items
@@ -0,0 +1,187 @@
+# retrieval_state.py
+"""
+Compact, array-backed chunk store for the QA process.
+
+The JSON path keeps a list of ~48k metadata dicts plus a dict of ~48k
+chunk texts keyed by long string IDs, per process. This store keeps the
+same information in three files that are memory-mapped read-only, so
+every worker process on a host shares one physical copy via the page
+cache:
+
+    state/
+      meta.npy       structured array, one row per FAISS row:
+                       source_id (int32), chunk_index (int32),
+                       text_offset (int64), text_len (int32)
+      texts.bin      all chunk texts, UTF-8, concatenated
+      sources.json   interned source table (row.source_id -> path)
+
+Chunk IDs are not stored: 04_chunk_texts.py derives them from the source
+path and chunk index, so they are rebuilt on lookup.
+
+Written by embeddings/05_build_faiss_index.py; can also be built from an
+existing metadata.jsonl + data_chunks/ without re-embedding:
+    (venv) python retrieval_state.py
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from index_versions import current_dir
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = current_dir()  # live index version (see index_versions.py)
+STATE_DIR = os.path.join(INDEX_DIR, "state")
+CHUNKS_DIR = os.path.join(BASE_DIR, "data_chunks")
+META_PATH = os.path.join(INDEX_DIR, "metadata.jsonl")
+
+META_DTYPE = np.dtype([
+    ("source_id", "<i4"),
+    ("chunk_index", "<i4"),
+    ("text_offset", "<i8"),
+    ("text_len", "<i4"),
+])
+
+
+def chunk_id(source: str, chunk_index: int) -> str:
+    """Same ID scheme as chunking/04_chunk_texts.py."""
+    return f"{os.path.splitext(source)[0]}-{chunk_index}"
+
+
+def write_compact_state(state_dir: str, metadata: list[dict], texts: list[str]):
+    """Write meta.npy / texts.bin / sources.json for rows aligned with the FAISS index."""
+    os.makedirs(state_dir, exist_ok=True)
+
+    source_ids: dict[str, int] = {}
+    meta = np.zeros(len(metadata), dtype=META_DTYPE)
+
+    tmp_texts = os.path.join(state_dir, "texts.bin.tmp")
+    offset = 0
+    with open(tmp_texts, "wb") as f:
+        for row, (m, text) in enumerate(zip(metadata, texts)):
+            data = text.encode("utf-8")
+            f.write(data)
+            meta[row] = (
+                source_ids.setdefault(m["source"], len(source_ids)),
+                m["chunk_index"],
+                offset,
+                len(data),
+            )
+            offset += len(data)
+
+    tmp_meta = os.path.join(state_dir, "meta.tmp.npy")
+    np.save(tmp_meta, meta)
+
+    tmp_sources = os.path.join(state_dir, "sources.json.tmp")
+    with open(tmp_sources, "w", encoding="utf-8") as f:
+        json.dump(list(source_ids), f, ensure_ascii=False)
+
+    os.replace(tmp_texts, os.path.join(state_dir, "texts.bin"))
+    os.replace(tmp_meta, os.path.join(state_dir, "meta.npy"))
+    os.replace(tmp_sources, os.path.join(state_dir, "sources.json"))
+    print(f"[STATE] Wrote compact state: {len(meta)} rows, {len(source_ids)} sources, "
+          f"{offset / 1e6:.1f} MB text → {state_dir}")
+
+
+def has_compact_state(state_dir: str = STATE_DIR) -> bool:
+    return all(
+        os.path.exists(os.path.join(state_dir, name))
+        for name in ("meta.npy", "texts.bin", "sources.json")
+    )
+
+
+class CompactChunkStore:
+    """Read-only, memory-mapped chunk store. lookup(row) mirrors the JSON store."""
+
+    def __init__(self, state_dir: str = STATE_DIR):
+        self.state_dir = state_dir
+        self.meta = np.load(os.path.join(state_dir, "meta.npy"), mmap_mode="r")
+        self.texts = np.memmap(os.path.join(state_dir, "texts.bin"), dtype=np.uint8, mode="r")
+        with open(os.path.join(state_dir, "sources.json"), "r", encoding="utf-8") as f:
+            self.sources = json.load(f)
+
+    def __len__(self):
+        return len(self.meta)
+
+    def text(self, row: int) -> str:
+        m = self.meta[row]
+        start = int(m["text_offset"])
+        return self.texts[start:start + int(m["text_len"])].tobytes().decode("utf-8")
+
+    def lookup(self, row: int) -> dict | None:
+        if row < 0 or row >= len(self.meta):
+            return None
+        m = self.meta[row]
+        source = self.sources[int(m["source_id"])]
+        chunk_index = int(m["chunk_index"])
+        return {
+            "id": chunk_id(source, chunk_index),
+            "source": source,
+            "chunk_index": chunk_index,
+            "text": self.text(row),
+        }
+
+
+class JsonChunkStore:
+    """The original metadata.jsonl + data_chunks/**/*.jsonl representation."""
+
+    def __init__(self, metadata: list[dict], chunk_text_map: dict[str, str]):
+        self.metadata = metadata
+        self.chunk_text_map = chunk_text_map
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def lookup(self, row: int) -> dict | None:
+        if row < 0 or row >= len(self.metadata):
+            return None
+        meta = self.metadata[row]
+        text = self.chunk_text_map.get(meta["id"])
+        if text is None:
+            return None
+        return {
+            "id": meta["id"],
+            "source": meta["source"],
+            "chunk_index": meta["chunk_index"],
+            "text": text,
+        }
+
+
+def load_metadata(meta_path: str = META_PATH) -> list[dict]:
+    metadata = []
+    with open(meta_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                metadata.append(json.loads(line))
+    return metadata
+
+
+def load_chunk_texts(chunks_dir: str = CHUNKS_DIR) -> dict[str, str]:
+    chunk_text_map = {}
+    for root, _, files in os.walk(chunks_dir):
+        for fname in files:
+            if not fname.endswith(".jsonl"):
+                continue
+            with open(Path(root) / fname, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    chunk_text_map[rec["id"]] = rec["text"]
+    return chunk_text_map
+
+
+def main():
+    metadata = load_metadata()
+    chunk_text_map = load_chunk_texts()
+    texts = [chunk_text_map.get(m["id"], "") for m in metadata]
+    missing = sum(1 for t in texts if not t)
+    if missing:
+        print(f"[STATE] WARNING: {missing} metadata rows have no chunk text")
+    write_compact_state(STATE_DIR, metadata, texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 # 01_download_scrape.py
+import hashlib
+import json
 import os
 import time
 import urllib.parse as up
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Set
 
 import requests
@@ -16,6 +19,13 @@ SESSION.headers.update({
 BASE_DIR = os.path.dirname(__file__)
 RAW_DIR = os.path.join(BASE_DIR, "data_raw")
 
+# Binary downloads (PDF reports can be hundreds of MB)
+CHUNK_BYTES = 1024 * 1024     # streamed to disk in pieces this size
+DOWNLOAD_RETRIES = 5          # each retry resumes from the bytes already on disk
+DOWNLOAD_TIMEOUT = (10, 60)   # connect, read (between chunks)
+PDF_WORKERS = 4               # concurrent downloads per crawl_pdfs_from_page
+RETRY_STATUSES = {408, 429}   # client errors worth retrying; other 4xx are final, 5xx always retried
+
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
@@ -48,6 +58,122 @@ def save_file(folder: str, filename: str, content: bytes | str, binary: bool):
         f.write(content)
     return path
 
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _write_json(path: str, data: dict):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+def _remove(*paths: str):
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _total_size(resp, offset: int) -> int | None:
+    # "Content-Range: bytes 1000-4999/5000" on a 206 ("bytes */5000" on a 416),
+    # Content-Length on a 200
+    content_range = resp.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = resp.headers.get("Content-Length")
+    if resp.status_code == 416 or length is None:
+        return None
+    return offset + int(length)
+
+def download_file(url: str, path: str, sha256: str | None = None,
+                  retries: int = DOWNLOAD_RETRIES, sleep: float = 0.5) -> str | None:
+    """
+    Stream url to path without holding it in memory.
+
+    Bytes go to path + ".part"; an interrupted download resumes with an
+    HTTP Range request (If-Range guards against the file having changed
+    on the server). The file is renamed into place only after its size
+    matches the server's and, if given, its sha256 matches. Connection
+    errors, timeouts and 5xx are retried; any other 4xx than 408/429 is
+    final.
+    """
+    if os.path.exists(path):
+        return path
+    ensure_dir(os.path.dirname(path))
+    part, meta_path = path + ".part", path + ".part.json"
+
+    for attempt in range(retries + 1):
+        meta = _read_json(meta_path)
+        offset = os.path.getsize(part) if os.path.exists(part) and meta.get("url") == url else 0
+        headers = {}
+        validator = meta.get("etag") or meta.get("last_modified")
+        if offset and validator:
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        try:
+            with SESSION.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers=headers) as resp:
+                if resp.status_code == 416:
+                    # Nothing left to send: the part file is already complete (checked below)
+                    total = _total_size(resp, offset) or meta.get("total")
+                else:
+                    resp.raise_for_status()
+                    if resp.status_code != 206:
+                        offset = 0  # full body: the server ignored the range or the file changed
+                    elif not resp.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                        _remove(part, meta_path)
+                        raise requests.RequestException(f"unexpected Content-Range {resp.headers.get('Content-Range')!r}")
+                    total = _total_size(resp, offset)
+                    if offset == 0:
+                        meta = {
+                            "url": url,
+                            "etag": resp.headers.get("ETag"),
+                            "last_modified": resp.headers.get("Last-Modified"),
+                            "total": total,
+                        }
+                        _write_json(meta_path, meta)
+                    with open(part, "ab" if offset else "wb") as f:
+                        for block in resp.iter_content(chunk_size=CHUNK_BYTES):
+                            f.write(block)
+        except requests.RequestException as e:
+            status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else None
+            if status is not None and 400 <= status < 500 and status not in RETRY_STATUSES:
+                print(f"[ERROR] {url}: HTTP {status}, skipped")
+                _remove(part, meta_path)
+                return None
+            print(f"[RETRY] {url} ({attempt + 1}/{retries + 1}) at {os.path.getsize(part) if os.path.exists(part) else 0} bytes: {e}")
+            time.sleep(min(30, 2 ** attempt))
+            continue
+        finally:
+            time.sleep(sleep)
+
+        size = os.path.getsize(part)
+        if total is not None and size < total:
+            print(f"[RETRY] {url}: got {size} of {total} bytes, resuming")
+            continue
+        if (total is not None and size > total) or (sha256 and file_sha256(part) != sha256.lower()):
+            print(f"[ERROR] {url}: size/hash mismatch, downloading again from scratch")
+            _remove(part, meta_path)
+            continue
+        if path.lower().endswith(".pdf"):
+            with open(part, "rb") as f:
+                if f.read(5) != b"%PDF-":
+                    print(f"[ERROR] {url}: not a PDF (probably an error page), skipped")
+                    _remove(part, meta_path)
+                    return None
+        os.replace(part, path)
+        _remove(meta_path)
+        return path
+
+    print(f"[ERROR] downloading {url}: giving up after {retries + 1} attempts (partial file kept for next run)")
+    return None
+
 def get_links(index_url: str,
               domain_filter: str | None = None,
               href_contains: List[str] | None = None) -> Set[str]:
@@ -194,17 +320,27 @@ def crawl_pdfs_from_page(index_url: str, subfolder: str):
     for a in soup.find_all("a", href=True):
         href = a["href"]
         if ".pdf" in href.lower():
-            full = up.urljoin(index_url, href)
+            # The fragment (#page=3) is never sent, so it doesn't make another file
+            full = up.urldefrag(up.urljoin(index_url, href)).url
             pdf_links.add(full)
 
-    print(f"[PDF CRAWL] {index_url} -> {len(pdf_links)} pdfs")
-
-    for url in tqdm(sorted(pdf_links), desc=f"PDFs {subfolder}"):
-        content = fetch(url, binary=True)
-        if not content:
-            continue
-        fname = safe_filename(url)
-        save_file(out_dir, fname.replace(".html", ".pdf"), content, binary=True)
+    # One download per target path: concurrent downloads of the same path would share its .part file
+    targets: dict[str, str] = {}
+    for url in sorted(pdf_links):
+        name = safe_filename(url).replace(".html", ".pdf")
+        if up.urlsplit(url).query:
+            # safe_filename drops the query (download.php?id=1, ?id=2, ...); keep those files apart
+            root, ext = os.path.splitext(name)
+            name = f"{root}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}{ext}"
+        targets.setdefault(os.path.join(out_dir, name), url)
+
+    print(f"[PDF CRAWL] {index_url} -> {len(targets)} pdfs")
+
+    # Memory stays at ~PDF_WORKERS * CHUNK_BYTES however large the files are
+    with ThreadPoolExecutor(max_workers=PDF_WORKERS) as pool:
+        futures = [pool.submit(download_file, url, path) for path, url in targets.items()]
+        for fut in tqdm(as_completed(futures), total=len(futures), desc=f"PDFs {subfolder}"):
+            fut.result()  # network errors are handled inside; re-raise anything else (e.g. disk full)
 
 def main():
     crawl_who()
@@ -0,0 +1,298 @@
+# sharding.py
+"""
+Sharded scatter-gather retrieval.
+
+Build:  05_build_faiss_index.py --shards N partitions the vectors into N
+        shards (all chunks of one source stay in the same shard):
+            <index version>/shards/shard_000/index.faiss
+                                            /ids.npy   (global row ids)
+Serve:  one retrieval worker per shard (process or host):
+            (venv) python sharding.py serve --shard-dir .../shard_000 --port 9201
+Query:  ShardedIndex embeds nothing itself; it takes the query vectors,
+        fans search() out to every shard in parallel, and merges the
+        per-shard top-k into a global top-k. It has the same
+        search(q, k) -> (scores, ids) signature as a FAISS index, so the
+        QA code can use it as a drop-in (QA_SHARDS=http://h1:9201,...).
+        Shards that fail or miss the deadline are skipped and reported
+        by search_partial(), so the answer degrades instead of stalling.
+
+Check a sharded build against the single index with local worker
+processes standing in for nodes:
+    (venv) python sharding.py check --spawn-local
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from index_versions import current_dir
+
+INDEX_DIR = current_dir()  # live index version (see index_versions.py)
+SHARDS_DIR = os.path.join(INDEX_DIR, "shards")
+
+SHARD_TIMEOUT_S = 2.0
+
+
+# ----- build -----
+def shard_of(source: str, n_shards: int) -> int:
+    """Stable shard assignment by source, so a document's chunks stay together."""
+    return zlib.crc32(source.encode("utf-8")) % n_shards
+
+
+def write_shards(embeddings: np.ndarray, metadata: list[dict], n_shards: int, out_dir: str = SHARDS_DIR):
+    import faiss
+
+    assignment = np.array([shard_of(m["source"], n_shards) for m in metadata])
+    dim = embeddings.shape[1]
+    for s in range(n_shards):
+        rows = np.nonzero(assignment == s)[0].astype("int64")
+        shard_dir = os.path.join(out_dir, f"shard_{s:03d}")
+        os.makedirs(shard_dir, exist_ok=True)
+
+        index = faiss.IndexFlatIP(dim)
+        if len(rows):
+            index.add(np.ascontiguousarray(embeddings[rows]))
+        faiss.write_index(index, os.path.join(shard_dir, "index.faiss"))
+        np.save(os.path.join(shard_dir, "ids.npy"), rows)
+        print(f"[SHARD] shard_{s:03d}: {len(rows)} vectors → {shard_dir}")
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_shards": n_shards, "dim": dim, "total": int(len(metadata))}, f)
+
+
+# ----- wire format -----
+def encode_array(a: np.ndarray) -> str:
+    buf = io.BytesIO()
+    np.save(buf, a, allow_pickle=False)
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def decode_array(s: str) -> np.ndarray:
+    return np.load(io.BytesIO(base64.b64decode(s)), allow_pickle=False)
+
+
+# ----- shards -----
+class LocalShard:
+    """A shard searched in this process; ids are mapped back to global rows."""
+
+    def __init__(self, shard_dir: str):
+        import faiss
+
+        self.name = os.path.basename(shard_dir.rstrip("/"))
+        self.index = faiss.read_index(os.path.join(shard_dir, "index.faiss"))
+        self.ids = np.load(os.path.join(shard_dir, "ids.npy"))
+
+    def search(self, q: np.ndarray, k: int):
+        scores, local = self.index.search(q, k)
+        global_ids = np.where(local >= 0, self.ids[np.clip(local, 0, None)], -1)
+        return scores, global_ids
+
+
+class HttpShard:
+    """Client for a shard served by `python sharding.py serve`."""
+
+    def __init__(self, url: str, timeout: float = SHARD_TIMEOUT_S):
+        import requests
+
+        self.name = url
+        self.url = url.rstrip("/") + "/search"
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def search(self, q: np.ndarray, k: int):
+        resp = self.session.post(self.url, json={"q": encode_array(q), "k": k}, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        return decode_array(data["scores"]), decode_array(data["ids"])
+
+
+def merge_topk(parts: list[tuple[np.ndarray, np.ndarray]], n_queries: int, k: int):
+    """Merge per-shard (scores, ids) into a global top-k per query row."""
+    if not parts:
+        return np.full((n_queries, k), -np.inf, dtype="float32"), np.full((n_queries, k), -1, dtype="int64")
+    scores = np.concatenate([p[0] for p in parts], axis=1)
+    ids = np.concatenate([p[1] for p in parts], axis=1)
+    scores = np.where(ids >= 0, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    top_scores = np.take_along_axis(scores, order, axis=1)
+    top_ids = np.take_along_axis(ids, order, axis=1)
+    if top_ids.shape[1] < k:
+        pad = k - top_ids.shape[1]
+        top_scores = np.pad(top_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        top_ids = np.pad(top_ids, ((0, 0), (0, pad)), constant_values=-1)
+    return top_scores.astype("float32"), top_ids.astype("int64")
+
+
+class ShardedIndex:
+    """Scatter-gather over shards; same search() signature as a FAISS index."""
+
+    def __init__(self, shards, timeout: float = SHARD_TIMEOUT_S):
+        self.shards = list(shards)
+        self.timeout = timeout
+        # A few slots per shard so concurrent queries don't queue behind each other
+        self.pool = ThreadPoolExecutor(max_workers=4 * max(1, len(self.shards)), thread_name_prefix="shard")
+
+    def search_partial(self, q: np.ndarray, k: int):
+        """Like search(), plus the names of shards that failed or missed the deadline."""
+        q = np.ascontiguousarray(q, dtype="float32")
+        futures = {self.pool.submit(s.search, q, k): s for s in self.shards}
+        done, not_done = wait(futures, timeout=self.timeout)
+
+        parts, missing = [], []
+        for fut, shard in futures.items():
+            if fut in done and fut.exception() is None:
+                parts.append(fut.result())
+            else:
+                missing.append(shard.name)
+        for fut in not_done:
+            fut.cancel()
+
+        scores, ids = merge_topk(parts, len(q), k)
+        return scores, ids, missing
+
+    def search(self, q: np.ndarray, k: int):
+        scores, ids, _ = self.search_partial(q, k)
+        return scores, ids
+
+    @property
+    def ntotal(self):
+        return sum(getattr(getattr(s, "index", None), "ntotal", 0) for s in self.shards)
+
+
+def shard_dirs(root: str = SHARDS_DIR) -> list[str]:
+    return sorted(
+        os.path.join(root, d) for d in os.listdir(root)
+        if d.startswith("shard_") and os.path.isdir(os.path.join(root, d))
+    )
+
+
+# ----- worker -----
+def make_handler(shard: LocalShard):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                body = json.dumps({"shard": shard.name, "ntotal": int(shard.index.ntotal)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if self.path != "/search":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length))
+            scores, ids = shard.search(decode_array(req["q"]), int(req["k"]))
+            body = json.dumps({"scores": encode_array(scores), "ids": encode_array(ids)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(shard_dir: str, host: str, port: int):
+    shard = LocalShard(shard_dir)
+    server = ThreadingHTTPServer((host, port), make_handler(shard))
+    print(f"[SHARD] {shard.name}: {shard.index.ntotal} vectors on {host}:{port}", flush=True)
+    server.serve_forever()
+
+
+def spawn_local_workers(dirs: list[str], base_port: int = 9201):
+    """Start one worker process per shard on localhost; returns (processes, urls)."""
+    procs, urls = [], []
+    for i, d in enumerate(dirs):
+        port = base_port + i
+        procs.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--shard-dir", d, "--port", str(port)]
+        ))
+        urls.append(f"http://127.0.0.1:{port}")
+
+    import requests
+
+    deadline = time.monotonic() + 60
+    for url in urls:
+        while True:
+            try:
+                requests.get(url + "/health", timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"shard worker at {url} did not start")
+                time.sleep(0.2)
+    return procs, urls
+
+
+def check(spawn_local: bool, queries: int, k: int):
+    """Compare sharded search with the single index on random stored vectors."""
+    import faiss
+
+    full = faiss.read_index(os.path.join(INDEX_DIR, "index.faiss"))
+    rng = np.random.default_rng(0)
+    rows = rng.choice(full.ntotal, size=min(queries, full.ntotal), replace=False)
+    q = np.vstack([full.reconstruct(int(r)) for r in rows]).astype("float32")
+    _, truth = full.search(q, k)
+
+    procs = []
+    dirs = shard_dirs()
+    if spawn_local:
+        procs, urls = spawn_local_workers(dirs)
+        shards = [HttpShard(u) for u in urls]
+    else:
+        shards = [LocalShard(d) for d in dirs]
+    try:
+        index = ShardedIndex(shards)
+        start = time.perf_counter()
+        _, found, missing = index.search_partial(q, k)
+        elapsed = time.perf_counter() - start
+    finally:
+        for p in procs:
+            p.terminate()
+
+    match = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    print(f"[SHARD] {len(dirs)} shards, {len(q)} queries: top-{k} agreement {match:.4f}, "
+          f"{elapsed * 1000:.1f} ms, missing={missing}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve", help="serve one shard over HTTP")
+    p_serve.add_argument("--shard-dir", required=True)
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=9201)
+
+    p_check = sub.add_parser("check", help="compare sharded search with the single index")
+    p_check.add_argument("--spawn-local", action="store_true", help="use local worker processes")
+    p_check.add_argument("--queries", type=int, default=200)
+    p_check.add_argument("--k", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        serve(args.shard_dir, args.host, args.port)
+    else:
+        check(args.spawn_local, args.queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# backends.py
+"""
+Inference backends for the M2M100 translation model.
+
+    torch  - transformers + PyTorch, fp32 (the original setup)
+    ct2    - CTranslate2 with int8 weights, much faster and lighter on CPU
+             (convert once with: python convert_ct2.py)
+
+Select with TRANSLATION_BACKEND=torch|ct2.
+
+The torch backend loads from a local safetensors snapshot when one exists
+(create it once with: python snapshot_model.py). safetensors files are
+memory-mapped, so loading skips the pickle read-and-copy of the .bin
+checkpoint and workers on one host read the weights through the shared
+page cache. TRANSLATION_DTYPE picks the precision:
+    float32   - the original weights
+    bfloat16  - half the memory, close to fp32 quality on recent CPUs
+    float16   - half the memory, for GPU use
+    qint8     - dynamic int8 quantization of the Linear layers (CPU)
+
+Both backends share the same latency tiers:
+    fast     - greedy decoding
+    quality  - beam search
+and cap the output length from the input length instead of the model's
+default max_length, so a short sentence never decodes 200 tokens.
+"""
+
+import os
+
+MODEL_NAME = os.environ.get("TRANSLATION_MODEL", "facebook/m2m100_418M")
+BACKEND = os.environ.get("TRANSLATION_BACKEND", "torch")
+CT2_MODEL_DIR = os.environ.get(
+    "CT2_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "models", "m2m100_418M-ct2-int8"),
+)
+CT2_THREADS = int(os.environ.get("CT2_THREADS", "0"))  # 0 = all cores
+MODEL_DIR = os.environ.get(
+    "TRANSLATION_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "models", "m2m100_418M"),
+)
+TORCH_DTYPE = os.environ.get("TRANSLATION_DTYPE", "float32")
+
+# Warm-up run before the service reports ready
+WARMUP_TEXT = "Take one tablet twice a day with food."
+WARMUP_PAIR = ("en", "hi")
+
+# Latency tiers (you can tweak these)
+TIERS = {
+    "fast": {"beam_size": 1},
+    "quality": {"beam_size": 4},
+}
+DEFAULT_TIER = os.environ.get("TRANSLATION_TIER", "fast")
+
+# Output length cap: max_new_tokens = input_tokens * ratio + margin
+MAX_LEN_RATIO = 1.5
+MAX_LEN_MARGIN = 10
+MAX_NEW_TOKENS = 256
+
+
+def max_new_tokens_for(input_len: int) -> int:
+    return min(MAX_NEW_TOKENS, int(input_len * MAX_LEN_RATIO) + MAX_LEN_MARGIN)
+
+
+def tier_settings(tier: str | None) -> dict:
+    return TIERS.get(tier or DEFAULT_TIER, TIERS[DEFAULT_TIER])
+
+
+def model_source() -> str:
+    """The local snapshot if it exists, else the hub model name."""
+    return MODEL_DIR if os.path.isdir(MODEL_DIR) else MODEL_NAME
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name: str | None = None, dtype: str = TORCH_DTYPE):
+        import torch
+        from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+
+        dtypes = {"float32": torch.float32, "bfloat16": torch.bfloat16, "float16": torch.float16, "qint8": torch.float32}
+        if dtype not in dtypes:
+            raise ValueError(f"Unknown TRANSLATION_DTYPE: {dtype!r} (expected one of {sorted(dtypes)})")
+
+        source = model_name or model_source()
+        self.torch = torch
+        self.dtype = dtype
+        self.source = source
+        self.tokenizer = M2M100Tokenizer.from_pretrained(source)
+        self.model = M2M100ForConditionalGeneration.from_pretrained(
+            source,
+            torch_dtype=dtypes[dtype],
+            low_cpu_mem_usage=True,
+            use_safetensors=True if os.path.isdir(source) else None,
+        )
+        if dtype == "qint8":
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model.eval()
+
+    def translate(self, texts: list[str], src: str, tgt: str, tier: str | None = None) -> list[str]:
+        self.tokenizer.src_lang = src
+        encoded = self.tokenizer(texts, return_tensors="pt", padding=True)
+        input_len = int(encoded["input_ids"].shape[1])
+        with self.torch.inference_mode():
+            generated = self.model.generate(
+                **encoded,
+                forced_bos_token_id=self.tokenizer.get_lang_id(tgt),
+                num_beams=tier_settings(tier)["beam_size"],
+                max_new_tokens=max_new_tokens_for(input_len),
+            )
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+
+class CTranslate2Backend:
+    name = "ct2"
+
+    def __init__(self, model_dir: str = CT2_MODEL_DIR, model_name: str | None = None):
+        import ctranslate2
+        from transformers import M2M100Tokenizer
+
+        if not os.path.isdir(model_dir):
+            raise FileNotFoundError(
+                f"CTranslate2 model not found at {model_dir}. Run: python convert_ct2.py"
+            )
+        self.dtype = "int8"
+        self.source = model_dir
+        self.tokenizer = M2M100Tokenizer.from_pretrained(model_name or model_source())
+        self.translator = ctranslate2.Translator(
+            model_dir,
+            device="cpu",
+            compute_type="int8",
+            intra_threads=CT2_THREADS,
+        )
+
+    def translate(self, texts: list[str], src: str, tgt: str, tier: str | None = None) -> list[str]:
+        self.tokenizer.src_lang = src
+        sources = [
+            self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(t))
+            for t in texts
+        ]
+        input_len = max(len(s) for s in sources)
+        tgt_token = self.tokenizer.lang_code_to_token[tgt]
+        results = self.translator.translate_batch(
+            sources,
+            target_prefix=[[tgt_token]] * len(sources),
+            beam_size=tier_settings(tier)["beam_size"],
+            max_decoding_length=max_new_tokens_for(input_len),
+        )
+        outputs = []
+        for r in results:
+            tokens = r.hypotheses[0][1:]  # drop the forced target language token
+            ids = self.tokenizer.convert_tokens_to_ids(tokens)
+            outputs.append(self.tokenizer.decode(ids, skip_special_tokens=True))
+        return outputs
+
+
+def warmup(backend) -> None:
+    """One short translation per tier, so the first real request doesn't pay for lazy init."""
+    src, tgt = WARMUP_PAIR
+    for tier in TIERS:
+        backend.translate([WARMUP_TEXT], src, tgt, tier)
+
+
+def load_backend(name: str = BACKEND):
+    if name == "torch":
+        return TorchBackend()
+    if name == "ct2":
+        return CTranslate2Backend()
+    raise ValueError(f"Unknown TRANSLATION_BACKEND: {name!r} (expected 'torch' or 'ct2')")
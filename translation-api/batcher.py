@@ -0,0 +1,159 @@
+# batcher.py
+"""
+Dynamic request batching for the M2M100 translation model.
+
+Requests are queued by the FastAPI handlers and picked up by a single
+background worker. The worker waits up to MAX_WAIT_MS for more requests
+to arrive, groups them by (source_lang, target_lang, tier), and runs one padded
+generate() call per group in a thread executor so the event loop stays
+responsive. Each request's future is resolved with its own translation.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Batching config (you can tweak these)
+MAX_BATCH_SIZE = 16    # max texts per generate() call
+MAX_WAIT_MS = 10       # how long to wait for more requests to join a batch
+
+# Bulk requests (length buckets)
+BUCKET_SIZE = 32              # max texts per bucket
+BUCKET_PADDED_CHARS = 12000   # max (texts x longest text) per bucket
+
+# translate_fn(texts, source_lang, target_lang, tier) -> list of translations
+TranslateFn = Callable[[list[str], str, str, str | None], list[str]]
+
+
+def length_buckets(
+    texts: list[str],
+    bucket_size: int = BUCKET_SIZE,
+    max_padded_chars: int = BUCKET_PADDED_CHARS,
+) -> list[list[int]]:
+    """
+    Sort texts by length and cut them into buckets of similar length, so
+    each padded batch wastes little work on padding. Returns buckets of
+    indices into `texts`.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    buckets: list[list[int]] = []
+    current: list[int] = []
+    for i in order:
+        # Sorted ascending, so texts[i] is the longest in the bucket so far
+        padded = (len(current) + 1) * len(texts[i])
+        if current and (len(current) >= bucket_size or padded > max_padded_chars):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+class TranslationBatcher:
+    def __init__(
+        self,
+        translate_fn: TranslateFn,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        self.translate_fn = translate_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # One inference thread: the tokenizer keeps src_lang as state and
+        # torch already parallelizes a single generate() across cores.
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="m2m100")
+        self.queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    # ----- lifecycle -----
+    def start(self):
+        if self._worker is None:
+            self.queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.executor.shutdown(wait=False)
+
+    # ----- public API -----
+    async def translate(self, text: str, source_lang: str, target_lang: str, tier: str | None = None) -> str:
+        if self.queue is None:
+            raise RuntimeError("TranslationBatcher.start() was not called")
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put(((source_lang, target_lang, tier), text, fut))
+        return await fut
+
+    async def translate_many(
+        self, texts: list[str], source_lang: str, target_lang: str, tier: str | None = None
+    ) -> list[str]:
+        return list(await asyncio.gather(
+            *(self.translate(t, source_lang, target_lang, tier) for t in texts)
+        ))
+
+    async def translate_bulk(
+        self, texts: list[str], source_lang: str, target_lang: str, tier: str | None = None
+    ) -> list[str]:
+        """
+        Translate many texts of one language pair in length buckets, one
+        generate() call per bucket. Runs on the same inference thread as
+        the queued requests, so the two never compete for the model.
+        """
+        loop = asyncio.get_running_loop()
+        out: list[str] = [""] * len(texts)
+        for bucket in length_buckets(texts):
+            outputs = await loop.run_in_executor(
+                self.executor, self.translate_fn,
+                [texts[i] for i in bucket], source_lang, target_lang, tier,
+            )
+            for i, tr in zip(bucket, outputs):
+                out[i] = tr
+        return out
+
+    # ----- worker -----
+    async def _collect(self):
+        first = await self.queue.get()
+        pending = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return pending
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect()
+
+            groups: dict[tuple, list] = {}
+            for key, text, fut in pending:
+                if not fut.cancelled():
+                    groups.setdefault(key, []).append((text, fut))
+
+            for (src, tgt, tier), items in groups.items():
+                texts = [text for text, _ in items]
+                try:
+                    outputs = await loop.run_in_executor(
+                        self.executor, self.translate_fn, texts, src, tgt, tier
+                    )
+                except Exception as e:
+                    for _, fut in items:
+                        if not fut.done():
+                            fut.set_exception(e)
+                    continue
+                for (_, fut), out in zip(items, outputs):
+                    if not fut.done():
+                        fut.set_result(out)
@@ -0,0 +1,130 @@
+# cache.py
+"""
+Two-level translation cache.
+
+    L1: in-memory LRU (OrderedDict), microsecond lookups
+    L2: SQLite on disk, survives restarts and is shared by workers
+
+Keys are (variant, source_lang, target_lang, sha1(normalized text)), where
+the variant names the model, backend, precision and tier that produced
+the translation (see main.cache_variant): a greedy int8 translation is
+never served for a beam-search request, and switching backends doesn't
+keep serving the old backend's output. Texts are cached per sentence segment, so a paragraph that repeats most of a
+previously seen answer only sends the new sentences to the model.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Cache config (you can tweak these)
+CACHE_PATH = os.environ.get(
+    "TRANSLATION_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "translation_cache.sqlite3"),
+)
+LRU_SIZE = int(os.environ.get("TRANSLATION_CACHE_LRU_SIZE", "50000"))
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def cache_key(src: str, tgt: str, text: str, variant: str = "") -> str:
+    digest = hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+    return f"{variant}|{src}:{tgt}:{digest}"
+
+
+class TranslationCache:
+    def __init__(self, path: str | None = CACHE_PATH, lru_size: int = LRU_SIZE):
+        self.lru_size = lru_size
+        self.lru: OrderedDict[str, str] = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "writes": 0}
+
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " translation TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+
+    # ----- single key -----
+    def _lru_put(self, key: str, value: str):
+        self.lru[key] = value
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def get_many(self, src: str, tgt: str, texts: list[str], variant: str = "") -> list[str | None]:
+        """Look up several texts; returns None for each miss."""
+        keys = [cache_key(src, tgt, t, variant) for t in texts]
+        out: list[str | None] = [None] * len(keys)
+        with self.lock:
+            missing = []
+            for i, key in enumerate(keys):
+                hit = self.lru.get(key)
+                if hit is not None:
+                    self.lru.move_to_end(key)
+                    self.stats["l1_hits"] += 1
+                    out[i] = hit
+                else:
+                    missing.append(i)
+
+            if missing and self.db is not None:
+                wanted = {keys[i] for i in missing}
+                placeholders = ",".join("?" * len(wanted))
+                rows = self.db.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    tuple(wanted),
+                ).fetchall()
+                found = dict(rows)
+                still_missing = []
+                for i in missing:
+                    hit = found.get(keys[i])
+                    if hit is not None:
+                        self._lru_put(keys[i], hit)
+                        self.stats["l2_hits"] += 1
+                        out[i] = hit
+                    else:
+                        still_missing.append(i)
+                missing = still_missing
+
+            self.stats["misses"] += len(missing)
+        return out
+
+    def put_many(self, src: str, tgt: str, texts: list[str], translations: list[str], variant: str = ""):
+        rows = []
+        with self.lock:
+            for text, tr in zip(texts, translations):
+                key = cache_key(src, tgt, text, variant)
+                self._lru_put(key, tr)
+                rows.append((key, tr, time.time()))
+            self.stats["writes"] += len(rows)
+            if self.db is not None and rows:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO translations (key, translation, created) VALUES (?, ?, ?)",
+                    rows,
+                )
+
+    # ----- metrics -----
+    def metrics(self) -> dict:
+        with self.lock:
+            s = dict(self.stats)
+            s["lru_entries"] = len(self.lru)
+        lookups = s["l1_hits"] + s["l2_hits"] + s["misses"]
+        s["lookups"] = lookups
+        s["hit_rate"] = (s["l1_hits"] + s["l2_hits"]) / lookups if lookups else 0.0
+        return s
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,105 @@
+# compare_backends.py
+"""
+Compare the quantized CTranslate2 backend against the fp32 torch backend
+on a fixed sample set, for every latency tier.
+
+Reports per (backend, tier):
+    - total / per-sentence latency
+    - chrF and exact-match rate against the torch fp32 "quality" outputs
+
+Run from translation-api/ (after python convert_ct2.py):
+    (venv) python compare_backends.py [--out compare_report.json]
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+
+from backends import TIERS, TorchBackend, CTranslate2Backend
+
+# Fixed sample set: short UI strings + typical answer sentences
+SAMPLES = [
+    "This information is not a substitute for professional medical advice.",
+    "Please consult a doctor if your symptoms get worse.",
+    "How long should I take this medicine?",
+    "Take this medication with a full glass of water.",
+    "Moxifloxacin is used to treat certain infections caused by bacteria.",
+    "Call your doctor right away if you have chest pain or trouble breathing.",
+    "Diabetes is a chronic disease that occurs when the pancreas does not produce enough insulin.",
+    "Keep all appointments with your doctor and the laboratory.",
+    "Children under five years old are at the highest risk of severe dehydration.",
+    "Do you have a fever, cough, or sore throat?",
+]
+TARGETS = ["hi", "ta", "te", "kn"]
+SOURCE = "en"
+
+
+def chrf(hyp: str, ref: str, max_n: int = 6, beta: float = 2.0) -> float:
+    """Character n-gram F-score (chrF), 0-100."""
+    hyp, ref = hyp.replace(" ", ""), ref.replace(" ", "")
+    precisions, recalls = [], []
+    for n in range(1, max_n + 1):
+        h = Counter(hyp[i:i + n] for i in range(len(hyp) - n + 1))
+        r = Counter(ref[i:i + n] for i in range(len(ref) - n + 1))
+        if not h or not r:
+            continue
+        overlap = sum((h & r).values())
+        precisions.append(overlap / sum(h.values()))
+        recalls.append(overlap / sum(r.values()))
+    if not precisions:
+        return 100.0 if hyp == ref else 0.0
+    p = sum(precisions) / len(precisions)
+    r = sum(recalls) / len(recalls)
+    if p + r == 0:
+        return 0.0
+    b2 = beta * beta
+    return 100.0 * (1 + b2) * p * r / (b2 * p + r)
+
+
+def run(backend, tier: str):
+    outputs = {}
+    start = time.perf_counter()
+    for tgt in TARGETS:
+        outputs[tgt] = backend.translate(SAMPLES, SOURCE, tgt, tier)
+    elapsed = time.perf_counter() - start
+    return outputs, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="compare_report.json")
+    args = parser.parse_args()
+
+    backends = [TorchBackend(), CTranslate2Backend()]
+
+    # Warm up both backends so the first timed call doesn't pay for it
+    for b in backends:
+        b.translate(SAMPLES[:1], SOURCE, TARGETS[0], "fast")
+
+    reference, _ = run(backends[0], "quality")
+
+    n_sentences = len(SAMPLES) * len(TARGETS)
+    report = []
+    for b in backends:
+        for tier in TIERS:
+            outputs, elapsed = run(b, tier)
+            pairs = [(h, r) for tgt in TARGETS for h, r in zip(outputs[tgt], reference[tgt])]
+            row = {
+                "backend": b.name,
+                "tier": tier,
+                "seconds": round(elapsed, 3),
+                "ms_per_sentence": round(1000 * elapsed / n_sentences, 1),
+                "chrf_vs_fp32": round(sum(chrf(h, r) for h, r in pairs) / len(pairs), 2),
+                "exact_match": round(sum(h == r for h, r in pairs) / len(pairs), 3),
+            }
+            report.append(row)
+            print(f"[COMPARE] {row}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"samples": n_sentences, "results": report}, f, indent=2)
+    print(f"[COMPARE] Wrote report → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# convert_ct2.py
+"""
+Convert facebook/m2m100_418M to a CTranslate2 int8 model for the
+`ct2` backend (see backends.py).
+
+Run once from translation-api/:
+    (venv) python convert_ct2.py
+    (venv) TRANSLATION_BACKEND=ct2 uvicorn main:app
+"""
+
+import argparse
+
+from ctranslate2.converters import TransformersConverter
+
+from backends import CT2_MODEL_DIR, MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", default=CT2_MODEL_DIR)
+    parser.add_argument("--quantization", default="int8", choices=["int8", "int8_float32", "float16", "float32"])
+    parser.add_argument("--force", action="store_true", help="overwrite an existing output dir")
+    args = parser.parse_args()
+
+    print(f"[CONVERT] {args.model} → {args.out} ({args.quantization})")
+    converter = TransformersConverter(args.model)
+    converter.convert(args.out, quantization=args.quantization, force=args.force)
+    print("[CONVERT] Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,219 @@
-from fastapi import FastAPI, Body
-from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Body, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backends import DEFAULT_TIER, MODEL_NAME, TIERS, load_backend, warmup
+from batcher import TranslationBatcher
+from cache import TranslationCache
+from segmenter import split_segments, join_segments
+
+# The model is loaded in the background after the server binds its port
+# (see lifespan); GET /ready turns 200 once it is loaded and warmed up.
+# TRANSLATION_BACKEND=torch|ct2, see backends.py
+backend = None
+startup = {"status": "pending", "load_seconds": None, "warmup_seconds": None, "error": None}
+
+
+def run_backend(texts: list[str], src: str, tgt: str, tier: str | None = None) -> list[str]:
+    return backend.translate(texts, src, tgt, tier)
+
+
+batcher = TranslationBatcher(run_backend)
+cache = TranslationCache()
+
+
+async def load_model():
+    """Load the backend off the event loop, warm it up, then mark the service ready."""
+    global backend
+    startup["status"] = "loading"
+    try:
+        start = time.perf_counter()
+        loaded = await asyncio.to_thread(load_backend)
+        startup["load_seconds"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        await asyncio.to_thread(warmup, loaded)
+        startup["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+        backend = loaded
+        startup["status"] = "ready"
+    except Exception as e:
+        startup["status"] = "failed"
+        startup["error"] = repr(e)
+        print(f"[STARTUP] Model load failed: {e!r}")
+
+
+def require_ready():
+    if startup["status"] != "ready":
+        raise HTTPException(status_code=503, detail=f"model {startup['status']}")
+
+
+def cache_variant(tier: str | None) -> str:
+    """Cache namespace for translations made now: model, backend, precision and tier."""
+    tier = tier if tier in TIERS else DEFAULT_TIER  # as backends.tier_settings resolves it
+    return f"{MODEL_NAME}/{backend.name}/{backend.dtype}/{tier}"
+
+
+async def translate_cached(text: str, src: str, tgt: str, tier: str | None = None) -> str:
+    """
+    Translate sentence by sentence, serving repeated sentences from the
+    cache and sending only the misses to the model (as one batch).
+    Only translations from the same model, backend and tier are reused.
+    """
+    segments = split_segments(text)
+    if not segments:
+        return ""
+    sentences = [seg for seg, _ in segments]
+    separators = [sep for _, sep in segments]
+
+    variant = cache_variant(tier)
+    translated = cache.get_many(src, tgt, sentences, variant)
+    missing = list(dict.fromkeys(s for s, t in zip(sentences, translated) if t is None))
+    if missing:
+        new = await batcher.translate_many(missing, src, tgt, tier)
+        cache.put_many(src, tgt, missing, new, variant)
+        lookup = dict(zip(missing, new))
+        translated = [t if t is not None else lookup[s] for s, t in zip(sentences, translated)]
+
+    return join_segments(translated, separators)
+
+
+async def translate_stream(text: str, src: str, tgt: str, tier: str | None = None):
+    """
+    Yield NDJSON lines, one per segment and in order, as soon as each
+    segment (and every one before it) is translated. All cache misses are
+    queued at once so the batcher still translates them in batches.
+    """
+    segments = split_segments(text)
+    sentences = [seg for seg, _ in segments]
+    variant = cache_variant(tier)
+    cached = cache.get_many(src, tgt, sentences, variant)
+
+    tasks: dict[str, asyncio.Task] = {}
+    for sentence, hit in zip(sentences, cached):
+        if hit is None and sentence not in tasks:
+            tasks[sentence] = asyncio.create_task(batcher.translate(sentence, src, tgt, tier))
+
+    try:
+        translated = []
+        for i, ((sentence, sep), hit) in enumerate(zip(segments, cached)):
+            if hit is None:
+                hit = await tasks[sentence]
+                cache.put_many(src, tgt, [sentence], [hit], variant)
+            translated.append(hit)
+            yield json.dumps({"index": i, "translation": hit, "separator": sep}, ensure_ascii=False) + "\n"
+
+        full = join_segments(translated, [sep for _, sep in segments])
+        yield json.dumps({"done": True, "translation": full}, ensure_ascii=False) + "\n"
+    finally:
+        # Client went away: don't keep translating for nobody
+        for task in tasks.values():
+            task.cancel()
+
+
+async def translate_items(items: list[dict], tier: str | None = None) -> list[str]:
+    """
+    Translate many texts with per-item language pairs. Texts are split
+    into segments, cached segments are reused, and the remaining segments
+    of each pair are translated in length-bucketed batches.
+    """
+    item_segments = [split_segments(item["text"]) for item in items]
+    variant = cache_variant(tier)
+
+    # (src, tgt) -> unique uncached segments
+    pending: dict[tuple[str, str], dict[str, None]] = {}
+    item_cached = []
+    for item, segments in zip(items, item_segments):
+        src, tgt = item["source_lang"], item["target_lang"]
+        sentences = [seg for seg, _ in segments]
+        cached = cache.get_many(src, tgt, sentences, variant)
+        item_cached.append(cached)
+        for sentence, hit in zip(sentences, cached):
+            if hit is None:
+                pending.setdefault((src, tgt), {})[sentence] = None
+
+    fresh: dict[tuple[str, str], dict[str, str]] = {}
+    for (src, tgt), sentences in pending.items():
+        sentences = list(sentences)
+        translated = await batcher.translate_bulk(sentences, src, tgt, tier)
+        cache.put_many(src, tgt, sentences, translated, variant)
+        fresh[(src, tgt)] = dict(zip(sentences, translated))
+
+    results = []
+    for item, segments, cached in zip(items, item_segments, item_cached):
+        lookup = fresh.get((item["source_lang"], item["target_lang"]), {})
+        translated = [hit if hit is not None else lookup[seg] for (seg, _), hit in zip(segments, cached)]
+        results.append(join_segments(translated, [sep for _, sep in segments]))
+    return results
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    batcher.start()
+    loading = asyncio.create_task(load_model())
+    yield
+    loading.cancel()
+    await batcher.stop()
+    cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    info = dict(startup)
+    if backend is not None:
+        info.update(backend=backend.name, dtype=backend.dtype, source=backend.source)
+    return JSONResponse(info, status_code=200 if startup["status"] == "ready" else 503)
 
-app = FastAPI()
-tokenizer = M2M100Tokenizer.from_pretrained("facebook/m2m100_418M")
-model = M2M100ForConditionalGeneration.from_pretrained("facebook/m2m100_418M")
 
 @app.post("/translate")
 async def translate(payload: dict = Body(...)):
+    require_ready()
     text = payload["text"]
     src = payload["source_lang"]
     tgt = payload["target_lang"]
-    tokenizer.src_lang = src
-    encoded = tokenizer(text, return_tensors="pt")
-    generated = model.generate(**encoded, forced_bos_token_id=tokenizer.get_lang_id(tgt))
-    translated = tokenizer.batch_decode(generated, skip_special_tokens=True)[0]
-    return {"translation": translated}
+    tier = payload.get("tier") or DEFAULT_TIER  # "fast" (greedy) | "quality" (beam search)
+    translated = await translate_cached(text, src, tgt, tier)
+    return {"translation": translated, "backend": backend.name}
+
+
+@app.post("/translate/batch")
+async def translate_batch(payload: dict = Body(...)):
+    """
+    Body: {"items": [{"text", "source_lang", "target_lang"}, ...], "tier"?}
+    Returns translations in request order.
+    """
+    require_ready()
+    items = payload["items"]
+    tier = payload.get("tier") or DEFAULT_TIER
+    translations = await translate_items(items, tier)
+    return {"translations": translations, "backend": backend.name}
+
+
+@app.post("/translate/stream")
+async def translate_streaming(payload: dict = Body(...)):
+    require_ready()
+    text = payload["text"]
+    src = payload["source_lang"]
+    tgt = payload["target_lang"]
+    tier = payload.get("tier") or DEFAULT_TIER
+    return StreamingResponse(
+        translate_stream(text, src, tgt, tier),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache.metrics()
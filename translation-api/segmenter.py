@@ -0,0 +1,78 @@
+# segmenter.py
+"""
+Split text into sentence segments while remembering the whitespace that
+followed each one, so translated segments can be stitched back together
+with the original paragraph/line structure.
+
+Sentences longer than MAX_SEGMENT_CHARS are split again at clause
+boundaries (or, as a last resort, spaces) so no single segment blows up
+generation time.
+"""
+
+import re
+
+MAX_SEGMENT_CHARS = 400
+
+# Sentence end: . ! ? (plus Devanagari danda) followed by whitespace,
+# or any newline run.
+_BOUNDARY_RE = re.compile(r"(?<=[.!?।])[ \t]+|\s*\n\s*")
+_CLAUSE_SEPS = ("; ", ": ", ", ", " ")
+
+
+def _split_long(seg: str, max_chars: int) -> list[str]:
+    """Cut an over-long sentence at the last clause separator before max_chars."""
+    parts = []
+    while len(seg) > max_chars:
+        cut = -1
+        for sep in _CLAUSE_SEPS:
+            cut = seg.rfind(sep, max_chars // 2, max_chars)
+            if cut != -1:
+                cut += len(sep.rstrip())
+                break
+        if cut == -1:
+            cut = max_chars
+        parts.append(seg[:cut].strip())
+        seg = seg[cut:].strip()
+    if seg:
+        parts.append(seg)
+    return parts
+
+
+def split_segments(text: str, max_chars: int = MAX_SEGMENT_CHARS) -> list[tuple[str, str]]:
+    """
+    Return [(segment, separator), ...] where joining segment + separator
+    for every pair reproduces `text` (modulo whitespace inside over-long
+    sentences, which are re-split on clause boundaries).
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    sentences = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        seg = text[start:m.start()]
+        if seg:
+            sentences.append((seg, m.group()))
+        start = m.end()
+    if start < len(text):
+        sentences.append((text[start:], ""))
+
+    segments = []
+    for seg, sep in sentences:
+        parts = _split_long(seg, max_chars)
+        if not parts:
+            continue
+        segments.extend((p, " ") for p in parts[:-1])
+        segments.append((parts[-1], sep))
+    return segments
+
+
+def join_segments(translated: list[str], separators: list[str]) -> str:
+    """Re-join translated segments using the original separators."""
+    out = []
+    for seg, sep in zip(translated, separators):
+        out.append(seg)
+        # Keep paragraph/line breaks; collapse other runs to one space
+        out.append(sep if "\n" in sep else (" " if sep else ""))
+    return "".join(out).strip()
@@ -0,0 +1,38 @@
+# snapshot_model.py
+"""
+Save facebook/m2m100_418M (model + tokenizer) as a local safetensors
+snapshot for the `torch` backend (see backends.py). The service then loads
+the memory-mapped weights from disk instead of the hub cache.
+
+Run once from translation-api/:
+    (venv) python snapshot_model.py
+    (venv) TRANSLATION_DTYPE=bfloat16 uvicorn main:app
+"""
+
+import argparse
+import os
+
+from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+
+from backends import MODEL_DIR, MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", default=MODEL_DIR)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing output dir")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.out) and not args.force:
+        raise SystemExit(f"{args.out} already exists (use --force to overwrite)")
+
+    print(f"[SNAPSHOT] {args.model} → {args.out}")
+    M2M100Tokenizer.from_pretrained(args.model).save_pretrained(args.out)
+    model = M2M100ForConditionalGeneration.from_pretrained(args.model)
+    model.save_pretrained(args.out, safe_serialization=True)
+    print("[SNAPSHOT] Done")
+
+
+if __name__ == "__main__":
+    main()